@@ -0,0 +1,334 @@
+"""Time the update path of the integration for 1, 10 and 100 entries.
+
+Payloads are replayed through a Home Assistant instance running the
+integration, fully offline: synthetic ones by default (see payloads.py),
+or recorded ones passed with --forecast and --observations.  Each entry
+follows its own post code, and a station of its own while there are
+enough.  For each number of entries, this reports:
+
+* update: one refresh of every coordinator, from a new publication of
+  every payload to the states written, parsing included;
+* forecast: building the daily and hourly forecasts of every weather
+  entity, as after a forecast update;
+* state write: every entity computing and writing its state, data
+  unchanged.
+
+The run stops if an update fails, or if an hour of the hourly forecast
+has no condition.  Payload parsing alone is timed as well.  Times are
+the best of several runs.  Save a run with --save, and compare a later
+one against it with --baseline:
+
+    python benchmarks/bench_entities.py --save before.json
+    python benchmarks/bench_entities.py --baseline before.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import pathlib
+import sys
+import time
+
+from typing import Any, Callable
+from unittest.mock import patch
+
+import payloads
+from instance import (
+    COMPONENT,
+    async_add_entry,
+    component_module,
+    running_hass,
+)
+
+ENTRY_COUNTS = (1, 10, 100)
+RUNS = 5
+
+
+class ReplayResponse:
+    """Enough of an aiohttp response for the integration."""
+
+    def __init__(self, status: int, body: bytes, headers: dict[str, str]):
+        self.status = status
+        self.headers = headers
+        self._body = body
+
+    async def __aenter__(self) -> "ReplayResponse":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        pass
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise RuntimeError("HTTP %s" % self.status)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    @property
+    def content(self) -> Any:
+        async def lines():
+            for line in self._body.splitlines(keepends=True):
+                yield line
+
+        return lines()
+
+
+class ReplaySession:
+    """Serves the current version of every payload, with validators.
+
+    Bumping version is what a new publication of every file does.
+    """
+
+    def __init__(
+        self,
+        forecast: Callable[[int, int], bytes],
+        observations: Callable[[int], bytes],
+    ) -> None:
+        self.version = 0
+        self.requests = 0
+        self._forecast = forecast
+        self._observations = observations
+
+    def get(self, url: str, headers: dict[str, str] | None = None, **kw):
+        self.requests += 1
+        etag = '"%s"' % self.version
+        if (headers or {}).get("If-None-Match") == etag:
+            return ReplayResponse(304, b"", {"ETag": etag})
+        if "/forecast" in url:
+            post_code = int(url.split("plz=")[1][:4])
+            body = self._forecast(self.version, post_code)
+        elif "VQHA80" in url:
+            body = self._observations(self.version)
+        else:
+            # Past observations: none, so that backfills end right away.
+            body = b"station_abbr;reference_timestamp\n"
+        return ReplayResponse(200, body, {"ETag": etag})
+
+
+def best_of(runs: int, fn: Callable[[], Any]) -> float:
+    """Return the best time of fn in milliseconds."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+async def async_best_of(runs: int, fn: Callable[[], Any]) -> float:
+    """Return the best time of the coroutine function fn in milliseconds."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+async def async_measure(
+    component: pathlib.Path,
+    session: ReplaySession,
+    stations: list[str],
+    count: int,
+    runs: int,
+) -> dict[str, float]:
+    """Return the timings of one number of entries."""
+    from homeassistant.helpers.entity_platform import async_get_platforms
+
+    async with running_hass(component) as hass:
+        with contextlib.ExitStack() as stack:
+            for name in ("hub", "backfill"):
+                module = component_module(component, name)
+                for factory in (
+                    "async_get_clientsession",
+                    "async_create_clientsession",
+                ):
+                    if hasattr(module, factory):
+                        stack.enter_context(
+                            patch.object(
+                                module,
+                                factory,
+                                lambda hass, **kw: session,
+                            )
+                        )
+            for i, post_code in enumerate(payloads.post_codes(count)):
+                await async_add_entry(
+                    hass,
+                    component,
+                    post_code,
+                    stations[i % len(stations)],
+                )
+            await hass.async_block_till_done()
+
+            domain = component_module(component, "const").DOMAIN
+            entries = [
+                hass.data[domain][entry.entry_id]
+                for entry in hass.config_entries.async_entries(domain)
+            ]
+            coordinators = [
+                c for e in entries for c in (e.forecast, e.real_time) if c
+            ]
+            platforms = async_get_platforms(hass, domain)
+            entities = [e for p in platforms for e in p.entities.values()]
+            weathers = [e for e in entities if e.entity_id.startswith("w")]
+
+            async def update():
+                session.version += 1
+                for coordinator in coordinators:
+                    # Forget the shared result, as time passing would.
+                    coordinator.fetcher._fetched_at = None
+                await asyncio.gather(
+                    *(c.async_refresh() for c in coordinators)
+                )
+                await hass.async_block_till_done()
+
+            async def forecast():
+                for weather in weathers:
+                    weather._async_build_forecast()
+                    await weather.async_forecast_daily()
+                    await weather.async_forecast_hourly()
+
+            def write():
+                for entity in entities:
+                    entity.async_write_ha_state()
+
+            failed = [
+                c.name for c in coordinators if not c.last_update_success
+            ]
+            if failed:
+                raise RuntimeError("Updates failed: %s" % ", ".join(failed))
+            for weather in weathers:
+                weather._async_build_forecast()
+                hourly = await weather.async_forecast_hourly() or []
+                if not hourly or any(
+                    "condition" not in hour for hour in hourly
+                ):
+                    raise RuntimeError(
+                        "Hours without a condition in the forecast of %s"
+                        % weather.entity_id
+                    )
+            return {
+                "update": await async_best_of(runs, update),
+                "forecast": await async_best_of(runs, forecast),
+                "state write": best_of(runs, write),
+            }
+
+
+def measure_parsing(
+    component: pathlib.Path,
+    forecast: bytes,
+    national: bytes,
+    runs: int,
+) -> dict[str, float]:
+    """Return the timings of parsing each payload once."""
+    client = component_module(component, "client")
+    observations = component_module(component, "observations")
+    # Quick enough to be run many more times.
+    runs *= 10
+    return {
+        "parse forecast": best_of(
+            runs,
+            lambda: client.parse_forecast(forecast),
+        ),
+        "parse observations": best_of(
+            runs,
+            lambda: observations.ObservationTable.parse(national),
+        ),
+    }
+
+
+def report(results: dict[str, float], baseline: dict[str, float]) -> None:
+    """Print the timings, next to the baseline ones if any."""
+    if baseline:
+        print("%-30s %12s %12s %8s" % ("", "ms", "baseline", "change"))
+    else:
+        print("%-30s %12s" % ("", "ms"))
+    for key, ms in results.items():
+        line = "%-30s %12.3f" % (key, ms)
+        if key in baseline:
+            before = baseline[key]
+            line += " %12.3f %+7.0f%%" % (before, (ms / before - 1) * 100)
+        print(line)
+
+
+async def async_main(args: argparse.Namespace) -> dict[str, float]:
+    component = args.component.resolve()
+    # Loads the component the way Home Assistant will.
+    sys.path.insert(0, str(component.parent.parent))
+
+    if args.forecast:
+        recorded_forecast = args.forecast.read_bytes()
+        forecast = lambda version, post_code: recorded_forecast  # noqa: E731
+    else:
+        forecast = payloads.forecast
+    if args.observations:
+        recorded_observations = args.observations.read_bytes()
+        observations = lambda version: recorded_observations  # noqa: E731
+    else:
+        observations = payloads.national_file
+    stations = component_module(component, "observations").ObservationTable
+    stations = stations.parse(observations(0)).stations
+
+    session = ReplaySession(forecast, observations)
+    results = measure_parsing(
+        component,
+        forecast(0, payloads.post_codes(1)[0]),
+        observations(0),
+        args.runs,
+    )
+    for count in args.entries:
+        timings = await async_measure(
+            component,
+            session,
+            stations,
+            count,
+            args.runs,
+        )
+        for name, ms in timings.items():
+            results[
+                "%s, %d entr%s" % (name, count, "y" if count == 1 else "ies")
+            ] = ms
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--component", type=pathlib.Path, default=COMPONENT)
+    parser.add_argument(
+        "--entries",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=list(ENTRY_COUNTS),
+        help="comma-separated numbers of entries",
+    )
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--forecast", type=pathlib.Path)
+    parser.add_argument("--observations", type=pathlib.Path)
+    parser.add_argument("--save", type=pathlib.Path)
+    parser.add_argument("--baseline", type=pathlib.Path)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    baseline = {}
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+    results = asyncio.run(async_main(args))
+    report(results, baseline)
+    if args.save:
+        from homeassistant.const import __version__
+
+        args.save.write_text(
+            json.dumps(
+                {
+                    "homeassistant": __version__,
+                    "python": sys.version.split()[0],
+                    "results": results,
+                },
+                indent=2,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
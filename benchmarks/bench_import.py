@@ -0,0 +1,109 @@
+"""Measure the import time and memory cost of the integration.
+
+Each scenario imports the integration's modules in a fresh interpreter,
+after the Home Assistant modules any running instance has loaded
+already, and reports the wall time, the growth of the resident set and
+the packages outside the integration that were pulled in.  Needs Home
+Assistant installed, but no network access.
+
+To compare with another revision, check it out elsewhere (for example
+with git worktree) and pass its component folder:
+
+    python benchmarks/bench_import.py
+    git worktree add ../old <revision>
+    python benchmarks/bench_import.py \
+        --component ../old/custom_components/meteo-swiss
+"""
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+
+COMPONENT = (
+    pathlib.Path(__file__).parent.parent / "custom_components" / "meteo-swiss"
+)
+PRELOADED = [
+    "homeassistant.components.sensor",
+    "homeassistant.components.weather",
+    "homeassistant.config_entries",
+    "homeassistant.core",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+]
+SCENARIOS = {
+    "runtime": ["", ".sensor", ".weather"],
+    "config flow": [".config_flow"],
+}
+RUNS = 5
+
+PROBE = """
+import importlib, json, os, sys, time
+sys.path.insert(0, {root!r})
+for name in {preloaded!r}:
+    importlib.import_module(name)
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+before = set(sys.modules)
+rss_before = rss()
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module("custom_components." + {package!r} + name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "time": elapsed,
+    "rss": rss() - rss_before,
+    "packages": sorted({{
+        m.partition(".")[0] for m in set(sys.modules) - before
+        if not m.startswith(("_", "custom_components"))
+    }}),
+}}))
+"""
+
+
+def probe(component: pathlib.Path, modules: list[str]) -> dict:
+    code = PROBE.format(
+        root=str(component.parent.parent),
+        preloaded=PRELOADED,
+        modules=modules,
+        package=component.name,
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--component", type=pathlib.Path, default=COMPONENT)
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args()
+    component = args.component.resolve()
+
+    print(
+        "%-12s %10s %10s  %s"
+        % ("scenario", "time (ms)", "RSS (KiB)", "new packages")
+    )
+    for scenario, modules in SCENARIOS.items():
+        results = [probe(component, modules) for _ in range(args.runs)]
+        print(
+            "%-12s %10.1f %10d  %s"
+            % (
+                scenario,
+                min(r["time"] for r in results) * 1000,
+                statistics.median(r["rss"] for r in results) // 1024,
+                ", ".join(results[0]["packages"]) or "-",
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compare the bulk observation table against per-station parsing.
+
+Before the national file was indexed once per cycle, every station
+downloaded it and scanned it for its own row.  This times both paths
+(parsing only; the per-station path also paid one download per station)
+on a synthetic national file, for 1, 10 and 150 stations.
+
+Run with:  python benchmarks/bench_observations.py
+"""
+import csv
+import importlib.util
+import io
+import pathlib
+import random
+import string
+import timeit
+
+COMPONENT = (
+    pathlib.Path(__file__).parent.parent / "custom_components" / "meteo-swiss"
+)
+COLUMNS = (
+    "tre200s0 rre150z0 sre000z0 gre000z0 ure200s0 tde200s0 dkl010z0 "
+    "fu3010z0 fu3010z1 prestas0 pp0qffs0 pp0qnhs0 ppz850s0 ppz700s0 "
+    "dv1towz0 fu3towz0 fu3towz1 ta1tows0 uretows0 tdetows0"
+).split()
+STATION_COUNT = 160
+
+
+def load_observations():
+    spec = importlib.util.spec_from_file_location(
+        "observations", COMPONENT / "observations.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_file(stations: list[str]) -> bytes:
+    rng = random.Random(0)
+    lines = [";".join(["Station/Location", "Date"] + COLUMNS)]
+    for station in stations:
+        fields = [station, "202311141230"]
+        for _ in COLUMNS:
+            if rng.random() < 0.2:
+                fields.append("-")
+            else:
+                fields.append("%.1f" % rng.uniform(0, 1000))
+        lines.append(";".join(fields))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def per_station(body: bytes, station: str) -> list[dict[str, str]]:
+    """The former path: scan the whole file for one station."""
+    reader = csv.DictReader(io.StringIO(body.decode("utf-8")), delimiter=";")
+    return [row for row in reader if row.get("Station/Location") == station]
+
+
+def main() -> None:
+    observations = load_observations()
+    rng = random.Random(1)
+    stations = sorted(
+        {"".join(rng.choices(string.ascii_uppercase, k=3)) for _ in range(400)}
+    )[:STATION_COUNT]
+    body = synthetic_file(stations)
+
+    print(
+        "%-10s %18s %18s %8s"
+        % ("stations", "per-station (ms)", "bulk (ms)", "ratio")
+    )
+    for n in (1, 10, 150):
+        wanted = stations[:n]
+
+        def old():
+            for s in wanted:
+                per_station(body, s)
+
+        def new():
+            table = observations.ObservationTable.parse(body)
+            for s in wanted:
+                table.observation(s)
+
+        repeat = max(3, 300 // n)
+        t_old = min(timeit.repeat(old, number=1, repeat=repeat)) * 1000
+        t_new = min(timeit.repeat(new, number=1, repeat=repeat)) * 1000
+        print("%-10d %18.3f %18.3f %7.1fx" % (n, t_old, t_new, t_old / t_new))
+
+
+if __name__ == "__main__":
+    main()
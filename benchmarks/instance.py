@@ -0,0 +1,89 @@
+"""A throwaway Home Assistant instance running the integration.
+
+The instance lives in a temporary configuration folder, where the
+component folder is linked as a custom component, and sets up nothing
+but the core and the config entries added to it.  Nothing is left
+behind once it stops.
+"""
+import contextlib
+import importlib
+import pathlib
+import tempfile
+
+from typing import Any, AsyncIterator
+
+COMPONENT = (
+    pathlib.Path(__file__).parent.parent / "custom_components" / "meteo-swiss"
+)
+CORE_CONFIG = {
+    "name": "Benchmark",
+    "latitude": 47.378,
+    "longitude": 8.566,
+    "elevation": 556,
+    "unit_system": "metric",
+    "time_zone": "Europe/Zurich",
+}
+
+
+@contextlib.asynccontextmanager
+async def running_hass(
+    component: pathlib.Path = COMPONENT,
+) -> AsyncIterator[Any]:
+    """Start Home Assistant with the component installed; stop it after."""
+    from homeassistant import bootstrap, loader
+    from homeassistant.core import HomeAssistant
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        custom = pathlib.Path(config_dir) / "custom_components"
+        custom.mkdir()
+        (custom / component.name).symlink_to(component.resolve())
+        hass = HomeAssistant(config_dir)
+        hass.config.skip_pip = True
+        loader.async_setup(hass)
+        if not await bootstrap.async_from_config_dict(
+            {"homeassistant": CORE_CONFIG},
+            hass,
+        ):
+            raise RuntimeError("Home Assistant failed to start")
+        await hass.async_start()
+        try:
+            yield hass
+        finally:
+            await hass.async_stop(force=True)
+
+
+def component_module(component: pathlib.Path, name: str = "") -> Any:
+    """Return a module of the component as Home Assistant loaded it."""
+    return importlib.import_module(
+        "custom_components." + component.name + ("." + name if name else "")
+    )
+
+
+async def async_add_entry(
+    hass: Any,
+    component: pathlib.Path,
+    post_code: int,
+    station: str | None,
+    **options: Any,
+) -> Any:
+    """Set up an entry for a post code and station, as the flow would."""
+    from homeassistant.config_entries import SOURCE_USER, ConfigEntry
+
+    const = component_module(component, "const")
+    name = "%s %s" % (post_code, station or "")
+    entry = ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=const.DOMAIN,
+        title=name,
+        data={
+            const.CONF_POSTCODE: post_code,
+            const.CONF_STATION: station,
+            const.CONF_FORECAST_NAME: "Forecast %s" % post_code,
+            const.CONF_REAL_TIME_NAME: station and "Station %s" % station,
+        },
+        options={**const.DEFAULT_OPTIONS, **options},
+        source=SOURCE_USER,
+    )
+    await hass.config_entries.async_add(entry)
+    return entry
@@ -0,0 +1,260 @@
+"""Run many entries against the stand-in server, for load and soak tests.
+
+Starts the stand-in server (standin.py) in a process of its own, then a
+Home Assistant instance with the integration pointed at it, and sets
+up --entries entries, each with its own post code.  Stations are
+shared once there are more entries than stations.  While the entries
+update on their own schedule, this reports, every --report-every
+seconds:
+
+* the lag of the event loop: how late a task waking up every 50 ms
+  gets to run, at the median, the 99th percentile and worst;
+* the depth of the executor queue: jobs waiting for a worker thread;
+* the resident memory, and its growth since the entries were set up;
+* the requests the stand-in served, and the unavailable entities.
+
+Arguments it does not know are passed on to the stand-in, so faults
+can be injected from the start; the stand-in can also be reconfigured
+while running, at the URL printed.  For example, an hour with 300
+entries, polled every minute, over a slow server:
+
+    python benchmarks/load.py --entries 300 --update-interval 1 \\
+        --duration 3600 --latency 0.5 --period 60
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import pathlib
+import statistics
+import sys
+import time
+
+from typing import Any
+
+import payloads
+from instance import (
+    COMPONENT,
+    async_add_entry,
+    component_module,
+    running_hass,
+)
+
+STANDIN = pathlib.Path(__file__).parent / "standin.py"
+LAG_INTERVAL = 0.05
+
+
+def rss() -> int:
+    """Return the resident memory of this process, in bytes."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class Monitor:
+    """Samples the event loop lag and the executor queue depth."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.lags: list[float] = []
+        self.queue_depths: list[int] = []
+
+    async def run(self) -> None:
+        loop = self.loop
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(loop.time() - start - LAG_INTERVAL)
+            executor = getattr(loop, "_default_executor", None)
+            if executor is not None:
+                self.queue_depths.append(executor._work_queue.qsize())
+
+    def take(self) -> tuple[list[float], list[int]]:
+        """Return the samples since the last call, and forget them."""
+        samples = self.lags, self.queue_depths
+        self.lags, self.queue_depths = [], []
+        return samples
+
+
+async def async_start_standin(extra: list[str]) -> tuple[Any, str]:
+    """Start the stand-in server; return its process and base URL."""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        str(STANDIN),
+        "--port",
+        "0",
+        *extra,
+        stdout=asyncio.subprocess.PIPE,
+    )
+    line = await process.stdout.readline()
+    if not line:
+        raise RuntimeError("The stand-in server did not start")
+    return process, line.decode().strip()
+
+
+async def async_run(args: argparse.Namespace, extra: list[str]) -> list:
+    from homeassistant.helpers import entity_registry as er
+    from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+    component = args.component.resolve()
+    process, base_url = await async_start_standin(extra)
+    print("Stand-in server at %s" % base_url)
+    samples = []
+    try:
+        async with running_hass(component) as hass:
+            client = component_module(component, "client")
+            os.environ[client.BASE_URL_VARIABLE] = base_url
+            const = component_module(component, "const")
+            stations = payloads.station_codes()
+            start = time.monotonic()
+            for i, post_code in enumerate(payloads.post_codes(args.entries)):
+                await async_add_entry(
+                    hass,
+                    component,
+                    post_code,
+                    stations[i % len(stations)],
+                    **{
+                        const.CONF_UPDATE_INTERVAL: args.update_interval,
+                        const.CONF_FORECAST_UPDATE_INTERVAL: (
+                            args.forecast_update_interval
+                        ),
+                        const.CONF_ALIGNED_POLLING: args.aligned,
+                    },
+                )
+            await hass.async_block_till_done()
+            print(
+                "Set up %d entries in %.1f s"
+                % (args.entries, time.monotonic() - start)
+            )
+
+            entity_ids = [
+                entity.entity_id
+                for entity in er.async_get(hass).entities.values()
+                if entity.platform == const.DOMAIN
+            ]
+            monitor = Monitor(hass.loop)
+            task = hass.loop.create_task(monitor.run())
+            session = async_get_clientsession(hass)
+            baseline = rss()
+            start = time.monotonic()
+            print(
+                "%8s %27s %10s %16s %9s %11s"
+                % (
+                    "time (s)",
+                    "loop lag (ms) p50/p99/max",
+                    "exec queue",
+                    "RSS MiB (growth)",
+                    "requests",
+                    "unavailable",
+                )
+            )
+            try:
+                while time.monotonic() - start < args.duration:
+                    await asyncio.sleep(
+                        min(
+                            args.report_every,
+                            args.duration - (time.monotonic() - start),
+                        )
+                    )
+                    lags, depths = monitor.take()
+                    async with session.get(base_url + "/_standin") as r:
+                        counts = (await r.json())["counts"]
+                    sample = {
+                        "time": time.monotonic() - start,
+                        "lag_p50": statistics.median(lags) * 1000,
+                        "lag_p99": quantile(lags, 0.99) * 1000,
+                        "lag_max": max(lags) * 1000,
+                        "queue_max": max(depths, default=0),
+                        "rss": rss(),
+                        "rss_growth": rss() - baseline,
+                        "requests": sum(
+                            n
+                            for kind, n in counts.items()
+                            if not kind.isdigit() and kind != "stale"
+                        ),
+                        "unavailable": sum(
+                            1
+                            for entity_id in entity_ids
+                            if hass.states.is_state(entity_id, "unavailable")
+                        ),
+                    }
+                    samples.append(sample)
+                    print(
+                        "%8.0f %9.2f/%8.2f/%8.2f %10d %9.1f (%+.1f) %9d %11d"
+                        % (
+                            sample["time"],
+                            sample["lag_p50"],
+                            sample["lag_p99"],
+                            sample["lag_max"],
+                            sample["queue_max"],
+                            sample["rss"] / 2**20,
+                            sample["rss_growth"] / 2**20,
+                            sample["requests"],
+                            sample["unavailable"],
+                        )
+                    )
+            finally:
+                task.cancel()
+    finally:
+        process.terminate()
+        await process.wait()
+    return samples
+
+
+def quantile(values: list[float], q: float) -> float:
+    """Return the q-quantile of values, by the nearest rank."""
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        epilog="Other arguments are passed on to standin.py.",
+    )
+    parser.add_argument("--component", type=pathlib.Path, default=COMPONENT)
+    parser.add_argument("--entries", type=int, default=100)
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=3600,
+        help="seconds",
+    )
+    parser.add_argument(
+        "--report-every",
+        type=float,
+        default=60,
+        help="seconds",
+    )
+    parser.add_argument(
+        "--update-interval",
+        type=int,
+        default=5,
+        help="minutes between real-time updates",
+    )
+    parser.add_argument(
+        "--forecast-update-interval",
+        type=int,
+        default=60,
+        help="minutes between forecast updates",
+    )
+    parser.add_argument(
+        "--aligned",
+        action="store_true",
+        help="poll after each publication instead",
+    )
+    parser.add_argument("--save", type=pathlib.Path)
+    args, extra = parser.parse_known_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    # The same loop and executor as Home Assistant itself runs on.
+    from homeassistant.runner import HassEventLoopPolicy
+
+    asyncio.set_event_loop_policy(HassEventLoopPolicy(False))
+    samples = asyncio.run(async_run(args, extra))
+    if args.save:
+        args.save.write_text(json.dumps(samples, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Synthetic Meteo Swiss payloads, shaped like the real ones.
+
+The benchmarks replay these instead of querying Meteo Swiss.  Each
+payload takes a version number: successive versions are what successive
+publications would look like, with a later time and slightly different
+values, so that replaying them exercises the whole update path.
+"""
+import datetime
+import json
+import math
+import random
+import string
+
+# Every column of the national file, not only those the integration uses.
+COLUMNS = (
+    "tre200s0 rre150z0 sre000z0 gre000z0 ure200s0 tde200s0 dkl010z0 "
+    "fu3010z0 fu3010z1 prestas0 pp0qffs0 pp0qnhs0 ppz850s0 ppz700s0 "
+    "dv1towz0 fu3towz0 fu3towz1 ta1tows0 uretows0 tdetows0"
+).split()
+STATION_COUNT = 160
+# Publication time of version 0 of the national file: the latest one,
+# so that forecasts are not all in the past.
+EPOCH = datetime.datetime.now(datetime.timezone.utc).replace(
+    second=0,
+    microsecond=0,
+)
+EPOCH -= datetime.timedelta(minutes=EPOCH.minute % 10)
+PUBLICATION_PERIOD = datetime.timedelta(minutes=10)
+# Lengths of the hourly forecast series, as served for a week ahead.
+# Precipitation is given every ten minutes for the first two days, and
+# hourly from then on.
+HOURLY_POINTS = 8 * 24
+THREE_HOURLY_POINTS = 8 * 8
+TEN_MINUTE_POINTS = 2 * 24 * 6
+LOW_RESOLUTION_POINTS = 6 * 24
+FORECAST_DAYS = 7
+
+
+def station_codes(count: int = STATION_COUNT) -> list[str]:
+    """Return distinct three-letter station codes, always the same ones."""
+    rng = random.Random(1)
+    codes: set[str] = set()
+    while len(codes) < count:
+        codes.add("".join(rng.choices(string.ascii_uppercase, k=3)))
+    return sorted(codes)
+
+
+def post_codes(count: int) -> list[int]:
+    """Return distinct Swiss post codes, always the same ones."""
+    return [1000 + 7 * i for i in range(count)]
+
+
+def national_file(
+    version: int = 0,
+    stations: list[str] | None = None,
+) -> bytes:
+    """Return the national observation file of one publication."""
+    stations = station_codes() if stations is None else stations
+    time = EPOCH + version * PUBLICATION_PERIOD
+    lines = [";".join(["Station/Location", "Date"] + COLUMNS)]
+    for s, station in enumerate(stations):
+        rng = random.Random(s)
+        fields = [station, time.strftime("%Y%m%d%H%M")]
+        for c, _ in enumerate(COLUMNS):
+            if rng.random() < 0.1:
+                fields.append("-")
+            else:
+                base = rng.uniform(0, 1000)
+                drift = 5 * math.sin((version + c) / 6)
+                fields.append("%.1f" % (base + drift))
+        lines.append(";".join(fields))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def forecast(version: int = 0, post_code: int = 8001) -> bytes:
+    """Return the forecast of a post code, as the app API serves it."""
+    rng = random.Random(post_code * 1000 + version)
+    # The series start a few hours before the forecast was made.
+    start = int(EPOCH.replace(minute=0).timestamp() * 1000)
+    start -= 3 * 3600 * 1000
+
+    def series(n: int, low: float, high: float) -> list[float]:
+        return [round(rng.uniform(low, high), 1) for _ in range(n)]
+
+    days = [
+        (EPOCH.date() + datetime.timedelta(days=d)).isoformat()
+        for d in range(FORECAST_DAYS + 1)
+    ]
+    data = {
+        "currentWeather": {
+            "time": start,
+            "icon": rng.randint(1, 42),
+            "iconV2": rng.randint(1, 42),
+            "temperature": round(rng.uniform(-5, 25), 1),
+        },
+        "regionForecast": [
+            {
+                "dayDate": day,
+                "iconDay": rng.randint(1, 42),
+                "iconDayV2": rng.randint(1, 42),
+                "temperatureMax": round(rng.uniform(5, 25), 0),
+                "temperatureMin": round(rng.uniform(-5, 5), 0),
+                "precipitation": round(rng.uniform(0, 10), 1),
+            }
+            for day in days
+        ],
+        "graph": {
+            "start": start,
+            "startLowResolution": start + 2 * 24 * 3600 * 1000,
+            "precipitation10m": series(TEN_MINUTE_POINTS, 0, 2),
+            "precipitationMin10m": series(TEN_MINUTE_POINTS, 0, 1),
+            "precipitationMax10m": series(TEN_MINUTE_POINTS, 0, 3),
+            "weatherIcon3h": [
+                rng.randint(1, 42) for _ in range(THREE_HOURLY_POINTS)
+            ],
+            "weatherIcon3hV2": [
+                rng.randint(1, 42) for _ in range(THREE_HOURLY_POINTS)
+            ],
+            "windDirection3h": [
+                rng.randint(0, 359) for _ in range(THREE_HOURLY_POINTS)
+            ],
+            "windSpeed3h": series(THREE_HOURLY_POINTS, 0, 40),
+            "sunrise": [start + d * 86400000 for d in range(FORECAST_DAYS)],
+            "sunset": [start + d * 86400000 for d in range(FORECAST_DAYS)],
+            "temperatureMin1h": series(HOURLY_POINTS, -5, 10),
+            "temperatureMax1h": series(HOURLY_POINTS, 10, 25),
+            "temperatureMean1h": series(HOURLY_POINTS, 0, 20),
+            "precipitation1h": series(LOW_RESOLUTION_POINTS, 0, 3),
+            "precipitationMin1h": series(LOW_RESOLUTION_POINTS, 0, 1),
+            "precipitationMax1h": series(LOW_RESOLUTION_POINTS, 0, 5),
+        },
+        "warnings": [],
+        "warningsOverview": [],
+    }
+    return json.dumps(data).encode()
+
+
+
+def station_list(stations: list[str] | None = None) -> bytes:
+    """Return the list of automatic stations, in its French edition."""
+    stations = station_codes() if stations is None else stations
+    lines = [
+        "Station;Abr.;WIGOS-ID;Type de station;Données;Longitude;Latitude;"
+        "Coordonnées est;Coordonnées nord;Altitude station m s. mer;"
+        "Hauteur du baromètre m s. sol;Hauteur de l'anémomètre m s. sol;"
+        "Canton;Mise en service;Link"
+    ]
+    for s, station in enumerate(stations):
+        rng = random.Random(s)
+        lines.append(
+            "Station %s;%s;;Station météo;Température;%.3f;%.3f;;;%d;;;;;"
+            % (
+                station,
+                station,
+                rng.uniform(6.0, 10.4),
+                rng.uniform(45.9, 47.7),
+                rng.uniform(200, 3500),
+            )
+        )
+    lines += ["", "Bemerkung", "Synthetic station list"]
+    return ("\n".join(lines) + "\n").encode("latin-1")
+
+
+def station_history(
+    station: str,
+    since: datetime.datetime,
+    until: datetime.datetime,
+) -> bytes:
+    """Return the 10-minute observations of a station over a period."""
+    s = sum(map(ord, station))
+    time = since.replace(second=0, microsecond=0)
+    time -= datetime.timedelta(minutes=time.minute % 10)
+    lines = [";".join(["station_abbr", "reference_timestamp"] + COLUMNS)]
+    while time <= until:
+        k = int(time.timestamp()) // 600
+        fields = [station, time.strftime("%d.%m.%Y %H:%M")]
+        for c, _ in enumerate(COLUMNS):
+            fields.append("%.1f" % (50 + 40 * math.sin((k + s + c) / 20)))
+        lines.append(";".join(fields))
+        time += PUBLICATION_PERIOD
+    return ("\n".join(lines) + "\n").encode()
@@ -0,0 +1,246 @@
+"""Replay an archive of recorded responses through the integration.
+
+Responses recorded with the "record raw responses" option (see
+recording.py) are fed, oldest first, to a Home Assistant instance
+running the integration, fully offline.  It gets one entry per post
+code found in the archive, and one per station followed, up to the
+larger of both; stations are those given with --stations, or else the
+first --max-stations of the first national file recorded.
+
+Each recorded response is served as the new publication of its
+payload, and the coordinators using it refreshed right away, or after
+the recorded delay divided by --speed if given.  Failed updates are
+reported as they happen, such as stations missing from a file, along
+with the parse and update throughput at the end:
+
+    python benchmarks/replay.py config/meteo-swiss-recordings
+    python benchmarks/replay.py recordings --profile replay.prof
+"""
+import argparse
+import asyncio
+import contextlib
+import cProfile
+import logging
+import pathlib
+import sys
+import time
+
+from collections import defaultdict
+from typing import Any
+from unittest.mock import patch
+from urllib.parse import urlsplit
+
+from bench_entities import ReplayResponse
+from instance import (
+    COMPONENT,
+    async_add_entry,
+    component_module,
+    running_hass,
+)
+
+NO_HISTORY = b"station_abbr;reference_timestamp\n"
+# Minutes between scheduled updates, long enough for none to happen:
+# only replayed responses trigger updates.
+IDLE_INTERVAL = 24 * 60
+
+
+def endpoint(url: str) -> tuple[str, str]:
+    """Return what identifies a URL, wherever it was fetched from."""
+    parts = urlsplit(url)
+    return parts.path, parts.query
+
+
+class ArchiveSession:
+    """Serves the latest replayed response of each endpoint."""
+
+    def __init__(self) -> None:
+        self.current: dict[tuple[str, str], Any] = {}
+
+    def get(self, url: str, headers: dict[str, str] | None = None, **kw):
+        response = self.current.get(endpoint(url))
+        if response is None:
+            # Past observations and anything else not recorded.
+            return ReplayResponse(200, NO_HISTORY, {})
+        etag = response.headers.get("ETag")
+        if etag and (headers or {}).get("If-None-Match") == etag:
+            return ReplayResponse(304, b"", response.headers)
+        return ReplayResponse(200, response.body, response.headers)
+
+    def detach(self) -> None:
+        pass
+
+
+def scan(records: Any, observations: Any) -> tuple[list[int], list[str]]:
+    """Return the post codes and the stations of the first national file."""
+    post_codes = []
+    stations = []
+    for record in records:
+        kind, arg = record.key
+        if kind == "forecast" and arg not in post_codes:
+            post_codes.append(arg)
+        elif kind == "observations" and not stations and record.body:
+            table = observations.ObservationTable.parse(record.body)
+            stations = table.stations
+    return post_codes, stations
+
+
+async def async_replay(args: argparse.Namespace) -> None:
+    component = args.component.resolve()
+    recording = component_module(component, "recording")
+    const = component_module(component, "const")
+    post_codes, stations = scan(
+        recording.read_archive(args.archive),
+        component_module(component, "observations"),
+    )
+    if args.stations:
+        stations = args.stations
+    else:
+        stations = stations[: args.max_stations]
+    if not post_codes and not stations:
+        raise SystemExit("No responses in %s" % args.archive)
+    # Entries need a post code; the forecast of the first one recorded
+    # does for those following a station only.
+    post_codes = post_codes or [8001]
+
+    session = ArchiveSession()
+    # The first response of each fetcher is served during setup.
+    for record in recording.read_archive(args.archive):
+        if record.status == 200:
+            session.current.setdefault(endpoint(record.url), record)
+
+    async with running_hass(component) as hass:
+        with contextlib.ExitStack() as stack:
+            for name in ("hub", "backfill"):
+                module = component_module(component, name)
+                for factory in (
+                    "async_get_clientsession",
+                    "async_create_clientsession",
+                ):
+                    if hasattr(module, factory):
+                        stack.enter_context(
+                            patch.object(
+                                module,
+                                factory,
+                                lambda hass, **kw: session,
+                            )
+                        )
+            count = max(len(post_codes), len(stations))
+            for i in range(count):
+                await async_add_entry(
+                    hass,
+                    component,
+                    post_codes[i % len(post_codes)],
+                    stations[i] if i < len(stations) else None,
+                    **{
+                        const.CONF_UPDATE_INTERVAL: IDLE_INTERVAL,
+                        const.CONF_FORECAST_UPDATE_INTERVAL: IDLE_INTERVAL,
+                    },
+                )
+            await hass.async_block_till_done()
+            print(
+                "Replaying %s through %d entries (%d post codes, "
+                "%d stations)"
+                % (args.archive, count, len(post_codes), len(stations))
+            )
+
+            domain = const.DOMAIN
+            fetchers = hass.data[domain][const.DATA_HUB]._fetchers
+            coordinators = defaultdict(list)
+            for entry in hass.config_entries.async_entries(domain):
+                data = hass.data[domain][entry.entry_id]
+                for c in (data.forecast, data.real_time):
+                    if c is not None:
+                        coordinators[c.fetcher.key].append(c)
+
+            profiler = cProfile.Profile() if args.profile else None
+            totals = defaultdict(lambda: defaultdict(float))
+            previous = None
+            start = time.perf_counter()
+            if profiler:
+                profiler.enable()
+            for record in recording.read_archive(args.archive):
+                key = tuple(record.key)
+                if record.status != 200 or key not in fetchers:
+                    continue
+                if args.speed and previous is not None:
+                    delay = (record.time - previous).total_seconds()
+                    await asyncio.sleep(max(delay, 0) / args.speed)
+                previous = record.time
+                session.current[endpoint(record.url)] = record
+                fetcher = fetchers[key]
+                # Forget the shared result, as time passing would.
+                fetcher._fetched_at = None
+                update_start = time.perf_counter()
+                await asyncio.gather(
+                    *(c.async_refresh() for c in coordinators[key])
+                )
+                await hass.async_block_till_done()
+                kind = totals[key[0]]
+                kind["responses"] += 1
+                kind["bytes"] += len(record.body)
+                kind["update"] += time.perf_counter() - update_start
+                kind["parse"] += (fetcher.stats.phases["parse"].last or 0)
+                for c in coordinators[key]:
+                    if not c.last_update_success:
+                        kind["failures"] += 1
+                        print(
+                            "%s %s: %s"
+                            % (record.time, c.name, c.last_exception)
+                        )
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(args.profile)
+            elapsed = time.perf_counter() - start
+
+    print("Replayed in %.2f s" % elapsed)
+    print(
+        "%-14s %9s %9s %12s %12s %9s"
+        % ("", "responses", "MiB", "parse MiB/s", "updates/s", "failures")
+    )
+    for kind, t in totals.items():
+        print(
+            "%-14s %9d %9.1f %12.1f %12.1f %9d"
+            % (
+                kind,
+                t["responses"],
+                t["bytes"] / 2**20,
+                t["bytes"] / 2**20 / (t["parse"] / 1000 or float("nan")),
+                t["responses"] / (t["update"] or float("nan")),
+                t["failures"],
+            )
+        )
+    if args.profile:
+        print("Profile saved to %s" % args.profile)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("archive", type=pathlib.Path)
+    parser.add_argument("--component", type=pathlib.Path, default=COMPONENT)
+    parser.add_argument(
+        "--stations",
+        type=lambda s: s.upper().split(","),
+        help="comma-separated stations to follow",
+    )
+    parser.add_argument("--max-stations", type=int, default=10)
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0,
+        help="times faster than recorded (default: as fast as possible)",
+    )
+    parser.add_argument(
+        "--profile",
+        type=pathlib.Path,
+        help="save a cProfile profile of the replay there",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    # Loads the component the way Home Assistant will.
+    sys.path.insert(0, str(args.component.resolve().parent.parent))
+    asyncio.run(async_replay(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Local stand-in for the Meteo Swiss servers.
+
+Serves forecasts, the national observation file, the station list and
+the past observations of stations on the same paths as the real
+servers, so that pointing the integration at it only takes setting
+METEOSWISS_BASE_URL:
+
+    python benchmarks/standin.py --port 8080
+    METEOSWISS_BASE_URL=http://localhost:8080 hass -c config
+
+Payloads are synthetic (see payloads.py) unless --recorded names a
+folder holding files saved from the real servers: forecast.json,
+VQHA80.csv and stations.csv, any of which may be left out.
+
+A new publication of every payload is made every --period seconds.
+Responses carry an ETag, unless --no-validators is given, and requests
+revalidating the current publication are answered 304.  Latency,
+errors and stale data can be injected; see --help.  The settings can
+also be changed while running, by POSTing JSON with the same names to
+/_standin, where GET returns them along with request counts.
+"""
+import argparse
+import asyncio
+import collections
+import datetime
+import functools
+import pathlib
+import random
+import time
+
+from typing import Any
+
+from aiohttp import web
+
+import payloads
+
+CONTROL_PATH = "/_standin"
+DEFAULTS = {
+    "period": 600.0,
+    "latency": 0.0,
+    "jitter": 0.5,
+    "error_rate": 0.0,
+    "stale_rate": 0.0,
+    "validators": True,
+}
+
+
+class StandIn:
+    """State and request handlers of the stand-in server."""
+
+    def __init__(self, recorded: pathlib.Path | None = None, **settings):
+        self.settings = {**DEFAULTS, **settings}
+        self.started = time.monotonic()
+        self.counts: collections.Counter = collections.Counter()
+        self._recorded: dict[str, bytes] = {}
+        if recorded is not None:
+            for name in ("forecast.json", "VQHA80.csv", "stations.csv"):
+                path = recorded / name
+                if path.exists():
+                    self._recorded[name] = path.read_bytes()
+
+    @property
+    def version(self) -> int:
+        """Return the number of the current publication."""
+        period = self.settings["period"]
+        if period <= 0:
+            return 0
+        return int((time.monotonic() - self.started) // period)
+
+    def app(self) -> web.Application:
+        """Return the web application serving every endpoint."""
+        app = web.Application()
+        app.router.add_get(CONTROL_PATH, self.get_control)
+        app.router.add_post(CONTROL_PATH, self.post_control)
+        app.router.add_get("/v1/forecast", self.forecast)
+        app.router.add_get(
+            "/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv",
+            self.observations,
+        )
+        app.router.add_get(
+            "/ch.meteoschweiz.messnetz-automatisch/{name}",
+            self.stations,
+        )
+        app.router.add_get(
+            "/ch.meteoschweiz.ogd-smn/{station}/{name}",
+            self.history,
+        )
+        return app
+
+    async def _respond(
+        self,
+        request: web.Request,
+        kind: str,
+        body: Any,
+    ) -> web.Response:
+        """Answer a request for a payload, with the faults configured.
+
+        body is called with the publication to serve.
+        """
+        settings = self.settings
+        self.counts[kind] += 1
+        latency = settings["latency"]
+        if latency > 0:
+            spread = latency * settings["jitter"]
+            await asyncio.sleep(
+                max(latency + random.uniform(-spread, spread), 0)
+            )
+        if random.random() < settings["error_rate"]:
+            self.counts["500"] += 1
+            raise web.HTTPInternalServerError()
+        version = self.version
+        if version and random.random() < settings["stale_rate"]:
+            # As a lagging cache would.
+            self.counts["stale"] += 1
+            version -= 1
+        headers = {}
+        if settings["validators"]:
+            etag = '"%s-%s"' % (kind, version)
+            if request.headers.get("If-None-Match") == etag:
+                self.counts["304"] += 1
+                raise web.HTTPNotModified(headers={"ETag": etag})
+            headers["ETag"] = etag
+        return web.Response(body=body(version), headers=headers)
+
+    async def forecast(self, request: web.Request) -> web.Response:
+        """Serve the forecast of a post code."""
+        try:
+            post_code = int(request.query["plz"][:4])
+        except (KeyError, ValueError):
+            raise web.HTTPBadRequest()
+        recorded = self._recorded.get("forecast.json")
+        return await self._respond(
+            request,
+            "forecast",
+            lambda version: recorded or _forecast(version, post_code),
+        )
+
+    async def observations(self, request: web.Request) -> web.Response:
+        """Serve the national observation file."""
+        recorded = self._recorded.get("VQHA80.csv")
+        return await self._respond(
+            request,
+            "observations",
+            lambda version: recorded or _national_file(version),
+        )
+
+    async def stations(self, request: web.Request) -> web.Response:
+        """Serve the station list."""
+        recorded = self._recorded.get("stations.csv")
+        return await self._respond(
+            request,
+            "stations",
+            lambda version: recorded or _station_list(),
+        )
+
+    async def history(self, request: web.Request) -> web.Response:
+        """Serve past observations of a station, by the day."""
+        station = request.match_info["station"].upper()
+        now = payloads.EPOCH + (
+            self.version * payloads.PUBLICATION_PERIOD
+        )
+        if request.match_info["name"].endswith("_t_now.csv"):
+            # From yesterday noon on.
+            since = now.replace(hour=12, minute=0) - datetime.timedelta(1)
+            until = now
+        else:
+            # From ten days ago to the end of yesterday.
+            since = now - datetime.timedelta(days=10)
+            until = now.replace(hour=0, minute=0)
+        return await self._respond(
+            request,
+            "history",
+            lambda version: payloads.station_history(station, since, until),
+        )
+
+    async def get_control(self, request: web.Request) -> web.Response:
+        """Return the settings and request counts."""
+        return web.json_response(
+            {
+                "settings": self.settings,
+                "version": self.version,
+                "counts": self.counts,
+            }
+        )
+
+    async def post_control(self, request: web.Request) -> web.Response:
+        """Change some settings."""
+        changes = await request.json()
+        unknown = set(changes) - set(DEFAULTS)
+        if unknown:
+            raise web.HTTPBadRequest(text="Unknown: %s" % ", ".join(unknown))
+        self.settings.update(changes)
+        return await self.get_control(request)
+
+
+# Publications are built once, however many clients fetch them.
+@functools.lru_cache(maxsize=2)
+def _national_file(version: int) -> bytes:
+    return payloads.national_file(version)
+
+
+@functools.lru_cache(maxsize=1024)
+def _forecast(version: int, post_code: int) -> bytes:
+    return payloads.forecast(version, post_code)
+
+
+@functools.lru_cache(maxsize=1)
+def _station_list() -> bytes:
+    return payloads.station_list()
+
+
+async def async_start(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    recorded: pathlib.Path | None = None,
+    **settings: Any,
+) -> tuple[web.AppRunner, str]:
+    """Start a stand-in server; return its runner and base URL."""
+    runner = web.AppRunner(
+        StandIn(recorded, **settings).app(),
+        access_log=None,
+    )
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound = runner.addresses[0]
+    return runner, "http://%s:%s" % (bound[0], bound[1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--recorded", type=pathlib.Path)
+    parser.add_argument(
+        "--period",
+        type=float,
+        default=DEFAULTS["period"],
+        help="seconds between publications (0 for never)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=DEFAULTS["latency"],
+        help="mean seconds before answering",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=DEFAULTS["jitter"],
+        help="spread of the latency, as a fraction of it",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=DEFAULTS["error_rate"],
+        help="fraction of requests answered 500",
+    )
+    parser.add_argument(
+        "--stale-rate",
+        type=float,
+        default=DEFAULTS["stale_rate"],
+        help="fraction of requests served the previous publication",
+    )
+    parser.add_argument(
+        "--no-validators",
+        dest="validators",
+        action="store_false",
+        help="send no ETag, so that no request gets a 304",
+    )
+    args = vars(parser.parse_args())
+
+    async def serve() -> None:
+        runner, url = await async_start(**args)
+        # Read by whoever started us to know where to connect.
+        print(url, flush=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,57 @@
 """Lifecycle of Swiss Meteo."""
+import asyncio
 import datetime
 import logging
-import pprint
 import time
 
-from async_timeout import timeout
+from dataclasses import dataclass
 from typing import Any
-from homeassistant.core import Config, HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, Config, HomeAssistant, callback
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
 from homeassistant.helpers.typing import HomeAssistantType
-from hamsclientfork import meteoSwissClient
 from homeassistant.helpers.issue_registry import IssueSeverity
 
 from .const import (
+    CONF_ALIGNED_POLLING,
     CONF_FORECAST_NAME,
+    CONF_FORECAST_UPDATE_INTERVAL,
+    CONF_MAX_STALE_AGE,
     CONF_NAME,
     CONF_POSTCODE,
+    CONF_PUBLICATION_DELAY,
     CONF_REAL_TIME_NAME,
+    CONF_RECORD_PAYLOADS,
     CONF_STATION,
     CONF_UPDATE_INTERVAL,
-    DEFAULT_UPDATE_INTERVAL,
+    CONF_VIRTUAL_STATION_SIZE,
+    DATA_HUB,
+    DATA_SNAPSHOTS,
+    DEFAULT_OPTIONS,
     DOMAIN,
 )
+from .client import forecast_from_json, forecast_to_json
+from .history import ObservationHistory
+from .hub import MeteoSwissHub, SharedFetcher
+from .metrics import DURATION_BOUNDS, RollingHistogram
+from .observations import Observation, ObservationTable
+from .snapshot import EntrySnapshot
+from .virtual import VirtualStation
 from homeassistant.const import Platform
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
 from homeassistant.helpers import issue_registry as ir
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
 
 _LOGGER = logging.getLogger(__name__)
 PLATFORMS = [Platform.SENSOR, Platform.WEATHER]
-MAX_CONTINUOUS_ERROR_TIME = 60 * 60
+# Consecutive national files missing a station before it is reported.
+MAX_MISSING_PUBLICATIONS = 6
+PUBLICATION_PERIOD = datetime.timedelta(minutes=10)
+ALIGNED_RETRY_INTERVAL = datetime.timedelta(seconds=30)
+ALIGNED_RETRY_WINDOW = datetime.timedelta(minutes=4)
 
 
 async def async_setup(hass: HomeAssistant, config: Config):
@@ -52,7 +72,9 @@ async def async_setup(hass: HomeAssistant, config: Config):
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
-    hass.data.setdefault(DOMAIN, {})
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_HUB not in domain_data:
+        domain_data[DATA_HUB] = MeteoSwissHub(hass)
 
     _LOGGER.debug("Current configuration: %s", entry.data)
     name = entry.data.get(
@@ -78,35 +100,128 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         )
         return False
 
-    interval = datetime.timedelta(
-        seconds=entry.data.get(
-            CONF_UPDATE_INTERVAL,
-            DEFAULT_UPDATE_INTERVAL,
-        )
-        * 60
+    hub = domain_data[DATA_HUB]
+    if _get_option(entry, CONF_RECORD_PAYLOADS):
+        entry.async_on_unload(hub.async_start_recording(entry.entry_id))
+    max_stale_age = datetime.timedelta(
+        minutes=_get_option(entry, CONF_MAX_STALE_AGE),
     )
-    coordinator = MeteoSwissDataUpdateCoordinator(
+    post_code = entry.data[CONF_POSTCODE]
+    station = entry.data.get(CONF_STATION, None)
+    forecast_name = entry.data.get(CONF_FORECAST_NAME, name)
+    real_time_name = entry.data.get(CONF_REAL_TIME_NAME, None)
+
+    forecast = MeteoSwissForecastCoordinator(
         hass,
-        interval,
-        entry.data[CONF_POSTCODE],
-        station=entry.data.get(CONF_STATION, None),
-        forecast_name=entry.data.get(CONF_FORECAST_NAME, name),
-        real_time_name=entry.data.get(CONF_REAL_TIME_NAME, None),
+        hub,
+        _get_interval(entry, CONF_FORECAST_UPDATE_INTERVAL),
+        max_stale_age,
+        post_code,
+        station,
+        forecast_name,
+        real_time_name,
     )
-    await coordinator.async_config_entry_first_refresh()
+    entry.async_on_unload(forecast.async_release)
+
+    # Data saved by the previous run is served right away, and refreshed
+    # in the background, so that setup does not wait for Meteo Swiss.
+    snapshots = domain_data.setdefault(DATA_SNAPSHOTS, {})
+    if entry.entry_id not in snapshots:
+        snapshots[entry.entry_id] = EntrySnapshot(hass, entry.entry_id)
+    snapshot = snapshots[entry.entry_id]
+    saved = await snapshot.async_load()
+    entry.async_on_unload(snapshot.async_flush)
+    first_refreshes = []
+    background_refreshes = []
+    if forecast.async_restore(snapshot, "forecast", saved.get("forecast")):
+        background_refreshes.append(forecast)
+    else:
+        first_refreshes.append(forecast.async_config_entry_first_refresh())
+
+    real_time = None
+    if station:
+        if _get_option(entry, CONF_ALIGNED_POLLING):
+            publication_delay = datetime.timedelta(
+                seconds=_get_option(entry, CONF_PUBLICATION_DELAY),
+            )
+        else:
+            publication_delay = None
+        real_time = MeteoSwissRealTimeCoordinator(
+            hass,
+            hub,
+            _get_interval(entry, CONF_UPDATE_INTERVAL),
+            max_stale_age,
+            post_code,
+            station,
+            forecast_name,
+            real_time_name,
+            publication_delay=publication_delay,
+        )
+        entry.async_on_unload(real_time.async_release)
+        real_time.async_restore(snapshot, "real_time", saved.get("real_time"))
+        # Real-time data is not essential for setting up the entry;
+        # without saved data, its sensors stay unavailable until a
+        # refresh succeeds.
+        background_refreshes.append(real_time)
+
+    if first_refreshes:
+        await asyncio.gather(*first_refreshes)
+    for coordinator in background_refreshes:
+        entry.async_create_background_task(
+            hass,
+            coordinator.async_refresh(),
+            "%s refresh" % coordinator.name,
+        )
+    if real_time and real_time.publication_delay is not None:
+        entry.async_on_unload(real_time.async_start_aligned_polling())
 
     entry.async_on_unload(entry.add_update_listener(update_listener))
 
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    domain_data[entry.entry_id] = MeteoSwissEntryData(
+        forecast,
+        real_time,
+        snapshot,
+    )
 
     await hass.config_entries.async_forward_entry_setups(
         entry,
         PLATFORMS,
     )
 
+    virtual_station_size = _get_option(entry, CONF_VIRTUAL_STATION_SIZE)
+    if real_time and virtual_station_size:
+        # The station list may have to be downloaded; until then, the
+        # observations of the station chosen are shown.
+        entry.async_create_background_task(
+            hass,
+            real_time.async_start_virtual_station(virtual_station_size),
+            "%s virtual station" % real_time.name,
+        )
+
+    if real_time and not real_time.backfilled:
+        # Once the sensors exist, so that their statistics can be filled.
+        entry.async_create_background_task(
+            hass,
+            real_time.async_backfill(entry.entry_id),
+            "%s backfill" % real_time.name,
+        )
+
     return True
 
 
+def _get_option(entry: ConfigEntry, key: str) -> Any:
+    """Return a setting, preferring the options over the data."""
+    return entry.options.get(
+        key,
+        entry.data.get(key, DEFAULT_OPTIONS[key]),
+    )
+
+
+def _get_interval(entry: ConfigEntry, key: str) -> datetime.timedelta:
+    """Return an update interval setting."""
+    return datetime.timedelta(minutes=_get_option(entry, key))
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Update listener."""
     await hass.config_entries.async_reload(entry.entry_id)
@@ -125,100 +240,626 @@ async def async_unload_entry(hass: HomeAssistantType, entry: ConfigEntry):
     return unload_ok
 
 
-class MeteoSwissDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Any]]):
-    """Class to manage fetching AccuWeather data API."""
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the data saved for a removed entry."""
+    snapshots = hass.data.get(DOMAIN, {}).get(DATA_SNAPSHOTS, {})
+    # Through the instance the entry used, which may have a save pending.
+    snapshot = snapshots.pop(entry.entry_id, None)
+    if snapshot is None:
+        snapshot = EntrySnapshot(hass, entry.entry_id)
+    await snapshot.async_remove()
+
+
+class MeteoSwissDataUpdateCoordinator(DataUpdateCoordinator[Any]):
+    """Base class of the coordinators polling one shared fetcher.
+
+    When an update fails, the last good data keeps being served, marked
+    as stale, until it is older than the maximum stale age.  The time
+    taken by the last updates is kept in update_times, in milliseconds;
+    attempt listeners are called after each update, even those which
+    leave the data as is and so skip the other listeners.
+    """
 
     def __init__(
         self,
         hass: HomeAssistant,
+        hub: MeteoSwissHub,
+        fetcher: SharedFetcher,
+        name: str,
         update_interval: datetime.timedelta,
+        max_stale_age: datetime.timedelta,
         post_code: int,
         station: str | None,
         forecast_name: str,
         real_time_name: str | None,
     ) -> None:
         """Initialize."""
-        self.first_error = None
-        self.error_raised = False
         self.hass = hass
+        self.hub = hub
+        self.fetcher = fetcher
+        self.max_stale_age = max_stale_age
         self.post_code = post_code
         self.station = station
         self.forecast_name = forecast_name
         self.real_time_name = real_time_name
+
+        self.unchanged_update_count = 0
+        self.update_times = RollingHistogram(DURATION_BOUNDS)
+        self.data_time: datetime.datetime | None = None
+        self._payload: Any = None
+        self._snapshot: EntrySnapshot | None = None
+        self._unsub_expiry: CALLBACK_TYPE | None = None
+        self._attempt_listeners: list[CALLBACK_TYPE] = []
+
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=name,
+            update_interval=update_interval,
+            # The same data object is handed back when the payload did
+            # not change, so listeners need not be called.
+            always_update=False,
+        )
+
+    async def _async_update_data(self) -> Any:
+        """Update data via the shared fetch hub."""
+        start = time.monotonic()
+        try:
+            payload = await self.fetcher.async_fetch(self.max_age)
+            if payload is self._payload:
+                self.unchanged_update_count += 1
+                data = self.data
+            else:
+                data = self._extract(payload)
+                self._payload = payload
+        except UpdateFailed:
+            self._async_update_failed()
+            raise
+        except Exception as exc:
+            self._async_update_failed()
+            raise UpdateFailed(exc) from exc
+        finally:
+            self.update_times.add((time.monotonic() - start) * 1000)
+            for update_callback in list(self._attempt_listeners):
+                update_callback()
+        self._async_cancel_expiry()
+        self.data_time = dt_util.utcnow()
+        # Saved only when new data was extracted: an unchanged payload
+        # would only move the time of the snapshot.
+        if self._snapshot is not None and data is not self.data:
+            self._snapshot.async_schedule_save()
+        return data
+
+    @callback
+    def async_add_attempt_listener(
+        self,
+        update_callback: CALLBACK_TYPE,
+    ) -> CALLBACK_TYPE:
+        """Call back after each update attempt; return a remove callback."""
+        self._attempt_listeners.append(update_callback)
+
+        @callback
+        def remove() -> None:
+            self._attempt_listeners.remove(update_callback)
+
+        return remove
+
+    def _extract(self, payload: Any) -> Any:
+        """Return our data out of the shared payload.
+
+        Raises UpdateFailed when the payload holds none of our data.
+        """
+        return payload
+
+    @callback
+    def _async_update_failed(self) -> None:
+        """Make entities unavailable once the data shown is too old."""
+        if (
+            not self.last_update_success
+            or self.data is None
+            or self.data_time is None
+        ):
+            return
+        self._async_cancel_expiry()
+        self._unsub_expiry = async_track_point_in_utc_time(
+            self.hass,
+            self._async_expire,
+            self.data_time + self.max_stale_age,
+        )
+
+    @callback
+    def _async_expire(self, _now: datetime.datetime) -> None:
+        self._unsub_expiry = None
+        _LOGGER.debug("Data of %s from %s expired", self.name, self.data_time)
+        self.async_update_listeners()
+
+    @callback
+    def _async_cancel_expiry(self) -> None:
+        if self._unsub_expiry:
+            self._unsub_expiry()
+            self._unsub_expiry = None
+
+    @property
+    def stale(self) -> bool:
+        """Return whether the data is kept from before a failed update."""
+        return not self.last_update_success
+
+    @property
+    def data_available(self) -> bool:
+        """Return whether there is data recent enough to be shown."""
+        if self.data is None:
+            return False
+        if self.last_update_success or self.data_time is None:
+            return True
+        return dt_util.utcnow() - self.data_time <= self.max_stale_age
+
+    def _dump(self, data: Any) -> Any:
+        """Return our data in JSON-serializable form."""
+        return data
+
+    def _load(self, dumped: Any) -> Any:
+        """Return our data out of what _dump returned."""
+        return dumped
+
+    @callback
+    def async_restore(
+        self,
+        snapshot: EntrySnapshot,
+        key: str,
+        saved: dict[str, Any] | None,
+    ) -> bool:
+        """Restore the data saved by a previous run, and save it from now on.
+
+        Returns whether data was restored.
+        """
+        self._snapshot = snapshot
+        snapshot.async_register(key, self._async_dump)
+        if not saved:
+            return False
+        try:
+            data = self._load(saved["data"])
+            data_time = dt_util.parse_datetime(saved["time"])
+        except Exception:
+            _LOGGER.warning("Could not restore saved %s", self.name)
+            return False
+        self.data = data
+        self.data_time = data_time
+        _LOGGER.debug("Restored %s from %s", self.name, data_time)
+        return True
+
+    @callback
+    def _async_dump(self) -> dict[str, Any] | None:
+        if self.data is None or self.data_time is None:
+            return None
+        return {
+            "data": self._dump(self.data),
+            "time": self.data_time.isoformat(),
+        }
+
+    @property
+    def not_modified_count(self) -> int:
+        """Return how many fetches of our data were answered with 304."""
+        return self.fetcher.not_modified_count
+
+    @property
+    def unchanged_count(self) -> int:
+        """Return how many downloads of our data had identical content."""
+        return self.fetcher.unchanged_count
+
+    def diagnostics(self) -> dict[str, Any]:
+        """Return the state of the coordinator and of its fetcher."""
+        return {
+            "name": self.name,
+            "update_interval": (
+                self.update_interval and self.update_interval.total_seconds()
+            ),
+            "last_update_success": self.last_update_success,
+            "data_time": self.data_time and self.data_time.isoformat(),
+            "unchanged_updates": self.unchanged_update_count,
+            "update_milliseconds": self.update_times.as_dict(),
+            "fetcher": self.fetcher.diagnostics(),
+        }
+
+    @property
+    def max_age(self) -> float:
+        """Return the age in seconds up to which shared results are reused.
+
+        Results fetched by another entry within half of our interval
+        are recent enough to be reused instead of downloaded again.
+        """
+        return self.update_interval.total_seconds() / 2
+
+    @callback
+    def async_release(self) -> None:
+        """Unsubscribe from the shared fetcher."""
+        self._async_cancel_expiry()
+        self.hub.async_release(self.fetcher)
+
+
+class MeteoSwissForecastCoordinator(MeteoSwissDataUpdateCoordinator):
+    """Polls the forecast of a post code."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        hub: MeteoSwissHub,
+        update_interval: datetime.timedelta,
+        max_stale_age: datetime.timedelta,
+        post_code: int,
+        station: str | None,
+        forecast_name: str,
+        real_time_name: str | None,
+    ) -> None:
+        """Initialize."""
         _LOGGER.debug(
             "Forecast %s will be provided for post code %s every %s",
             forecast_name,
             post_code,
             update_interval,
         )
+        super().__init__(
+            hass,
+            hub,
+            hub.async_acquire_forecast(post_code),
+            "%s forecast %s" % (DOMAIN, post_code),
+            update_interval,
+            max_stale_age,
+            post_code,
+            station,
+            forecast_name,
+            real_time_name,
+        )
+
+    def _dump(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Return the forecast in JSON-serializable form."""
+        return forecast_to_json(data)
+
+    def _load(self, dumped: dict[str, Any]) -> dict[str, Any]:
+        """Return the forecast out of what _dump returned."""
+        return forecast_from_json(dumped)
+
+
+class MeteoSwissRealTimeCoordinator(MeteoSwissDataUpdateCoordinator):
+    """Polls the real-time observations of a station.
 
-        if station:
+    The last two days of observations are kept in a ring buffer, along
+    with aggregates over them such as rain totals.  The first time, it is
+    filled from the recent history of the station, which is imported in
+    the statistics of the sensors as well.
+
+    With a publication delay, polls are not made at a fixed interval but
+    shortly after each SwissMetNet publication instead, retrying within
+    a short window until the new sample shows up.
+
+    With a virtual station, the observations are not those of the
+    station but interpolated from the stations of the virtual station,
+    out of the same national file.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        hub: MeteoSwissHub,
+        update_interval: datetime.timedelta,
+        max_stale_age: datetime.timedelta,
+        post_code: int,
+        station: str,
+        forecast_name: str,
+        real_time_name: str | None,
+        publication_delay: datetime.timedelta | None = None,
+    ) -> None:
+        """Initialize."""
+        self.virtual_station: VirtualStation | None = None
+        self.missing_count = 0
+        self.error_raised = False
+        self._missing_from: ObservationTable | None = None
+        self.history = ObservationHistory(dt_util.DEFAULT_TIME_ZONE)
+        self.backfilled = False
+        self.publication_delay = publication_delay
+        self._unsub_aligned: CALLBACK_TYPE | None = None
+        self._stopped = False
+        if publication_delay is None:
             _LOGGER.debug(
                 "Real-time %s will be updated from %s every %s",
                 real_time_name,
                 station,
                 update_interval,
             )
-
-        self.client = meteoSwissClient(
-            "%s / %s" % (forecast_name, real_time_name),
+        else:
+            _LOGGER.debug(
+                "Real-time %s will be updated from %s %s after publication",
+                real_time_name,
+                station,
+                publication_delay,
+            )
+            update_interval = None
+        super().__init__(
+            hass,
+            hub,
+            hub.async_acquire_observations(),
+            "%s station %s" % (DOMAIN, station),
+            update_interval,
+            max_stale_age,
             post_code,
-            station if station else "NO STATION",
+            station,
+            forecast_name,
+            real_time_name,
         )
-        _LOGGER.debug("Client obtained")
 
-        super().__init__(
-            hass,
-            _LOGGER,
-            name=DOMAIN,
-            update_interval=update_interval,
+    def _extract(self, payload: ObservationTable) -> Observation:
+        """Return the observations of our station out of the national table.
+
+        Runs once per new national file, so that a bad row is reported
+        once per update.
+        """
+        if self.virtual_station is not None:
+            observation = self.virtual_station.interpolate(payload)
+        else:
+            observation = payload.observation(self.station)
+        if observation is None:
+            self._async_station_missing(payload)
+            raise UpdateFailed(
+                "Station %s is missing from the real-time data"
+                % self.station
+            )
+        self._async_station_present()
+        self.history.append(observation)
+        if observation.time is None:
+            _LOGGER.warning(
+                "Station %s reported observations with no valid date",
+                self.station,
+            )
+        if observation.missing and _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Station %s did not report %s",
+                self.station,
+                ", ".join(observation.missing),
+            )
+        return observation
+
+    @property
+    def issue_id(self) -> str:
+        """Return the ID of the repair issue about our station."""
+        return f"{self.station}_provides_no_data_{DOMAIN}"
+
+    @callback
+    def _async_station_missing(self, payload: ObservationTable) -> None:
+        # The same file is handed back until a new one is published, so
+        # only count each file once.
+        if payload is self._missing_from:
+            return
+        self._missing_from = payload
+        self.missing_count += 1
+        _LOGGER.warning(
+            "Station %s provided us with no real-time data",
+            self.station,
+        )
+        if (
+            self.error_raised
+            or self.missing_count < MAX_MISSING_PUBLICATIONS
+        ):
+            return
+        ir.async_create_issue(
+            self.hass,
+            DOMAIN,
+            self.issue_id,
+            is_fixable=False,
+            is_persistent=False,
+            severity=IssueSeverity.ERROR,
+            translation_key="station_no_data",
+            translation_placeholders={
+                "station": self.station,
+            },
         )
+        self.error_raised = True
+
+    @callback
+    def _async_station_present(self) -> None:
+        self.missing_count = 0
+        self._missing_from = None
+        if self.error_raised:
+            ir.async_delete_issue(self.hass, DOMAIN, self.issue_id)
+            self.error_raised = False
+
+    def _dump(self, data: Observation) -> dict[str, Any]:
+        """Return the observations in JSON-serializable form."""
+        return data.as_dict()
+
+    def _load(self, dumped: dict[str, Any]) -> Observation:
+        """Return the observations out of what _dump returned."""
+        return Observation.from_dict(dumped)
+
+    @callback
+    def async_restore(
+        self,
+        snapshot: EntrySnapshot,
+        key: str,
+        saved: dict[str, Any] | None,
+    ) -> bool:
+        """Also restore the history of observations."""
+        self.backfilled = bool(saved and saved.get("backfilled"))
+        if saved and saved.get("history"):
+            try:
+                self.history.load(saved["history"])
+            except Exception:
+                _LOGGER.warning("Could not restore history of %s", self.name)
+                self.history = ObservationHistory(dt_util.DEFAULT_TIME_ZONE)
+        return super().async_restore(snapshot, key, saved)
+
+    @callback
+    def _async_dump(self) -> dict[str, Any] | None:
+        dumped = super()._async_dump()
+        if dumped is not None:
+            dumped["history"] = self.history.as_dict()
+            dumped["backfilled"] = self.backfilled
+        return dumped
+
+    async def async_backfill(self, entry_id: str) -> None:
+        """Fill the history and statistics with past observations."""
+        from . import backfill
 
-    async def _async_update_data(self) -> dict[str, Any]:
-        """Update data via library."""
         try:
-            async with timeout(15):
-                data = await self.hass.async_add_executor_job(
-                    self.client.get_data,
-                )
+            observations = await backfill.async_backfill(
+                self.hass,
+                entry_id,
+                self.station,
+            )
         except Exception as exc:
-            raise UpdateFailed(exc) from exc
+            _LOGGER.warning(
+                "Could not download past observations of %s: %s",
+                self.station,
+                exc,
+            )
+            return
+        # Observations received in the meantime go after the past ones.
+        history = ObservationHistory(dt_util.DEFAULT_TIME_ZONE)
+        for observation in observations:
+            history.append(observation)
+        history.load(self.history.as_dict())
+        self.history = history
+        self.backfilled = True
+        if self._snapshot is not None:
+            self._snapshot.async_schedule_save()
+        self.async_update_listeners()
 
-        _LOGGER.debug("Data obtained:\n%s", pprint.pformat(data))
-        if self.station:
-            if not data.get("condition"):
-                # Oh no.  We could not retrieve the URL.
-                # We try 20 times.  If it does not succeed,
-                # we will induce a config error.
-                _LOGGER.warning(
-                    "Station %s provided us with no real-time data",
-                    self.station,
-                )
-                if self.first_error is None:
-                    self.first_error = time.time()
-
-                m = MAX_CONTINUOUS_ERROR_TIME
-                last_error = time.time() - self.first_error
-                if not self.error_raised and last_error > m:
-                    ir.async_create_issue(
-                        self.hass,
-                        DOMAIN,
-                        f"{self.station}_provides_no_data_{DOMAIN}",
-                        is_fixable=False,
-                        is_persistent=False,
-                        severity=IssueSeverity.ERROR,
-                        translation_key="station_no_data",
-                        translation_placeholders={
-                            "station": self.station,
-                        },
-                    )
-                    self.error_raised = True
-            else:
-                self.first_error = None
-                self.error_raised = False
+    async def async_start_virtual_station(self, size: int) -> None:
+        """Interpolate the observations at home from the nearest stations.
 
-        data[CONF_STATION] = self.station
-        data[CONF_POSTCODE] = self.post_code
-        data[CONF_FORECAST_NAME] = self.forecast_name
-        data[CONF_REAL_TIME_NAME] = self.real_time_name
-        return data
+        The station chosen keeps being shown when the station list
+        cannot be obtained.
+        """
+        from .stations import STATION_TYPE_WEATHER, async_get_station_cache
+
+        cache = async_get_station_cache(self.hass)
+        try:
+            stations = await cache.async_get(STATION_TYPE_WEATHER)
+            index = await cache.async_get_index(STATION_TYPE_WEATHER)
+        except Exception as exc:
+            _LOGGER.warning(
+                "Could not obtain the station list, so showing the "
+                "observations of %s only: %s",
+                self.station,
+                exc,
+            )
+            return
+        virtual_station = VirtualStation.nearest(
+            self.station,
+            self.hass.config.latitude,
+            self.hass.config.longitude,
+            self.hass.config.elevation,
+            size,
+            stations,
+            index,
+        )
+        if virtual_station is None:
+            _LOGGER.warning(
+                "No stations to interpolate from, so showing the "
+                "observations of %s only",
+                self.station,
+            )
+            return
+        _LOGGER.debug(
+            "Real-time data of %s interpolated from %s",
+            self.station,
+            ", ".join(virtual_station.stations),
+        )
+        self.virtual_station = virtual_station
+        # Extracted again from the national file, even if unchanged.
+        self._payload = None
+        await self.async_refresh()
+
+    def diagnostics(self) -> dict[str, Any]:
+        """Also return the state of the station and of its history."""
+        return {
+            **super().diagnostics(),
+            "station": self.station,
+            "aligned": self.publication_delay is not None,
+            "missing_count": self.missing_count,
+            "history_length": len(self.history),
+            "backfilled": self.backfilled,
+            "virtual_station": self.virtual_station
+            and self.virtual_station.stations,
+        }
+
+    @property
+    def max_age(self) -> float:
+        """Return the age in seconds up to which shared results are reused."""
+        if self.publication_delay is None:
+            return super().max_age
+        return ALIGNED_RETRY_INTERVAL.total_seconds() / 2
+
+    @property
+    def sample_time(self) -> datetime.datetime | None:
+        """Return the measurement time of the current sample, if any."""
+        if not self.data:
+            return None
+        return self.data.time
+
+    @callback
+    def async_start_aligned_polling(self) -> CALLBACK_TYPE:
+        """Start polling after each publication; return a stop callback."""
+        self._stopped = False
+        self._async_schedule_aligned_refresh()
+        return self._async_stop_aligned_polling
+
+    @callback
+    def _async_stop_aligned_polling(self) -> None:
+        self._stopped = True
+        self._async_cancel_aligned_refresh()
+
+    @callback
+    def _async_cancel_aligned_refresh(self) -> None:
+        if self._unsub_aligned:
+            self._unsub_aligned()
+            self._unsub_aligned = None
+
+    @callback
+    def _async_schedule_aligned_refresh(self) -> None:
+        self._async_cancel_aligned_refresh()
+        now = dt_util.utcnow()
+        boundary = now.replace(
+            minute=now.minute - now.minute % 10,
+            second=0,
+            microsecond=0,
+        )
+        published = boundary + self.publication_delay
+        sample_time = self.sample_time
+
+        if sample_time is not None and sample_time >= boundary:
+            # Up to date; wait for the next publication.
+            when = published + PUBLICATION_PERIOD
+        elif now < published:
+            when = published
+        elif now < published + ALIGNED_RETRY_WINDOW:
+            # Not published yet; retry shortly.
+            when = now + ALIGNED_RETRY_INTERVAL
+        else:
+            _LOGGER.debug(
+                "Station %s did not publish the %s sample in time",
+                self.station,
+                boundary,
+            )
+            when = published + PUBLICATION_PERIOD
+
+        _LOGGER.debug("Next real-time refresh of %s at %s", self.station, when)
+        self._unsub_aligned = async_track_point_in_utc_time(
+            self.hass,
+            self._async_aligned_refresh,
+            when,
+        )
+
+    async def _async_aligned_refresh(self, _now: datetime.datetime) -> None:
+        self._unsub_aligned = None
+        await self.async_refresh()
+        # Stopped while refreshing, when the entry was unloaded.
+        if not self._stopped:
+            self._async_schedule_aligned_refresh()
+
+
+@dataclass
+class MeteoSwissEntryData:
+    """Coordinators and saved data of a config entry."""
+
+    forecast: MeteoSwissForecastCoordinator
+    real_time: MeteoSwissRealTimeCoordinator | None
+    snapshot: EntrySnapshot
@@ -0,0 +1,206 @@
+"""One-off import of the recent observations of a newly added station."""
+import datetime
+import logging
+
+from async_timeout import timeout
+from typing import Any, Iterable
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
+
+from .client import HEADERS, endpoint
+from .const import DOMAIN
+from .observations import OBSERVATION_FIELDS, Observation
+from .sensor import SENSOR_TYPES
+
+_LOGGER = logging.getLogger(__name__)
+
+# 10-minute observations of a station, from the start of the year to
+# the end of yesterday, and from yesterday noon until now.
+RECENT_URL = (
+    "https://data.geo.admin.ch/ch.meteoschweiz.ogd-smn/{0}"
+    "/ogd-smn_{0}_t_recent.csv"
+)
+NOW_URL = (
+    "https://data.geo.admin.ch/ch.meteoschweiz.ogd-smn/{0}"
+    "/ogd-smn_{0}_t_now.csv"
+)
+STATION_COLUMN = "station_abbr"
+TIME_COLUMN = "reference_timestamp"
+TIME_FORMAT = "%d.%m.%Y %H:%M"
+# Enough for the statistics of the last week to show no gap, and for
+# the history of the coordinator, which holds two days, to be full.
+# Every observation kept is held in memory until imported, 144 a day,
+# so the window stays short, though statistics are kept for good.
+BACKFILL_PERIOD = datetime.timedelta(days=10)
+BACKFILL_TIMEOUT = 120
+HOUR = datetime.timedelta(hours=1)
+
+
+def parse_row(
+    station: str,
+    header: list[str],
+    line: str,
+) -> Observation | None:
+    """Return the observation of a row of a station data file."""
+    fields = line.rstrip("\r\n").split(";")
+    if len(fields) != len(header):
+        return None
+    row = dict(zip(header, fields))
+    try:
+        time = datetime.datetime.strptime(
+            row[TIME_COLUMN],
+            TIME_FORMAT,
+        ).replace(tzinfo=datetime.timezone.utc)
+    except (KeyError, ValueError):
+        return None
+    values = {}
+    for name, field in OBSERVATION_FIELDS.items():
+        try:
+            values[field] = float(row[name])
+        except (KeyError, ValueError):
+            pass
+    return Observation(station, time, **values)
+
+
+async def async_fetch_history(
+    hass: HomeAssistant,
+    station: str,
+    since: datetime.datetime,
+) -> list[Observation]:
+    """Download the observations of a station since a time, oldest first.
+
+    Files are streamed line by line, keeping only the rows of interest,
+    so that the months of data before them are never held in memory.
+    """
+    session = async_get_clientsession(hass)
+    observations: list[Observation] = []
+    async with timeout(BACKFILL_TIMEOUT):
+        for url in (RECENT_URL, NOW_URL):
+            url = endpoint(url.format(station.lower()))
+            async with session.get(url, headers=HEADERS) as response:
+                response.raise_for_status()
+                header: list[str] | None = None
+                async for raw in response.content:
+                    line = raw.decode("utf-8", errors="replace")
+                    if header is None:
+                        header = line.rstrip("\r\n").split(";")
+                        continue
+                    observation = parse_row(station, header, line)
+                    if (
+                        observation is None
+                        or observation.time < since
+                        or observations
+                        and observation.time <= observations[-1].time
+                    ):
+                        continue
+                    observations.append(observation)
+    return observations
+
+
+def hourly_statistics(
+    observations: Iterable[Observation],
+    field: str,
+    until: datetime.datetime,
+) -> list[dict[str, Any]]:
+    """Return the hourly mean, minimum and maximum of a field.
+
+    Each observation covers the 10 minutes up to its time, and is counted
+    in the hour those fall in.  Hours from until on are left out.
+    """
+    hours: dict[datetime.datetime, list[float]] = {}
+    for observation in observations:
+        value = getattr(observation, field)
+        if value is None:
+            continue
+        start = (observation.time - datetime.timedelta(seconds=1)).replace(
+            minute=0,
+            second=0,
+            microsecond=0,
+        )
+        if start + HOUR > until:
+            continue
+        hour = hours.get(start)
+        if hour is None:
+            hours[start] = [value, 1, value, value]
+        else:
+            hour[0] += value
+            hour[1] += 1
+            hour[2] = min(hour[2], value)
+            hour[3] = max(hour[3], value)
+    return [
+        {
+            "start": start,
+            "mean": round(total / count, 2),
+            "min": low,
+            "max": high,
+        }
+        for start, (total, count, low, high) in sorted(hours.items())
+    ]
+
+
+async def async_backfill(
+    hass: HomeAssistant,
+    entry_id: str,
+    station: str,
+) -> list[Observation]:
+    """Import the recent observations of a station into the statistics.
+
+    Hourly statistics are imported for every real-time sensor of the
+    entry that has some, in one batch per sensor.  Returns the
+    observations, so that they can be used for other purposes.
+    """
+    now = dt_util.utcnow()
+    observations = await async_fetch_history(
+        hass,
+        station,
+        now - BACKFILL_PERIOD,
+    )
+    _LOGGER.debug(
+        "Downloaded %s past observations of %s",
+        len(observations),
+        station,
+    )
+    if not observations or "recorder" not in hass.config.components:
+        return observations
+
+    from homeassistant.components.recorder.statistics import (
+        async_import_statistics,
+    )
+
+    # Hours from the current one on are compiled by the recorder.
+    until = now.replace(minute=0, second=0, microsecond=0)
+    registry = er.async_get(hass)
+    for description in SENSOR_TYPES:
+        if description.state_class is None:
+            continue
+        entity_id = registry.async_get_entity_id(
+            "sensor",
+            DOMAIN,
+            "sensor.%s-%s" % (entry_id, description.key),
+        )
+        if entity_id is None:
+            continue
+        statistics = hourly_statistics(
+            observations,
+            description.field,
+            until,
+        )
+        if not statistics:
+            continue
+        async_import_statistics(
+            hass,
+            {
+                "has_mean": True,
+                "has_sum": False,
+                "name": None,
+                "source": "recorder",
+                "statistic_id": entity_id,
+                "unit_of_measurement": (
+                    description.native_unit_of_measurement
+                ),
+            },
+            statistics,
+        )
+    return observations
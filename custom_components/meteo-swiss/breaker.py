@@ -0,0 +1,114 @@
+"""Circuit breaker guarding each Meteo Swiss endpoint."""
+import logging
+import random
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# Consecutive failures after which requests are held back.
+FAILURE_THRESHOLD = 3
+# Backoff after opening, doubled on each failed probe up to the maximum.
+BASE_DELAY = 30
+MAX_DELAY = 30 * 60
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a request while the breaker is open."""
+
+
+class CircuitBreaker:
+    """Stops requests to a failing endpoint, probing it with backoff.
+
+    After FAILURE_THRESHOLD consecutive failures the breaker opens, and
+    requests are refused until a retry time.  The first request after
+    that is let through as a probe: success closes the breaker, failure
+    opens it again for twice as long, up to MAX_DELAY.  Delays are
+    jittered so that restarted instances do not probe in lockstep.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        base_delay: float = BASE_DELAY,
+        max_delay: float = MAX_DELAY,
+    ) -> None:
+        """Initialize."""
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.delay = 0.0
+        self.last_error: Exception | None = None
+        self._retry_at = 0.0
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until requests are let through again."""
+        if self.state != STATE_OPEN:
+            return 0.0
+        return max(self._retry_at - time.monotonic(), 0.0)
+
+    @property
+    def exhausted(self) -> bool:
+        """Return whether the backoff has reached its maximum delay."""
+        return self.state != STATE_CLOSED and self.delay >= self.max_delay
+
+    def allow_request(self) -> bool:
+        """Return whether a request may be made now."""
+        if self.state == STATE_OPEN and self.retry_in <= 0:
+            _LOGGER.debug("Probing %s", self.name)
+            self.state = STATE_HALF_OPEN
+        return self.state != STATE_OPEN
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful request."""
+        if self.state != STATE_CLOSED:
+            _LOGGER.info(
+                "%s is reachable again after %s failures",
+                self.name,
+                self.failures,
+            )
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.delay = 0.0
+        self.last_error = None
+
+    def record_failure(self, error: Exception) -> None:
+        """Count a failed request, opening the breaker when needed."""
+        self.failures += 1
+        self.last_error = error
+        if (
+            self.state == STATE_CLOSED
+            and self.failures < self.failure_threshold
+        ):
+            return
+        if self.state == STATE_CLOSED:
+            self.delay = self.base_delay
+        else:
+            self.delay = min(self.delay * 2, self.max_delay)
+        # Equal jitter: at least half of the delay, at most all of it.
+        wait = self.delay / 2 + random.uniform(0, self.delay / 2)
+        if self.state == STATE_CLOSED:
+            _LOGGER.warning(
+                "%s failed %s times in a row (%s); retrying in %d s",
+                self.name,
+                self.failures,
+                error,
+                wait,
+            )
+        else:
+            _LOGGER.debug(
+                "%s still failing (%s); retrying in %d s",
+                self.name,
+                error,
+                wait,
+            )
+        self.state = STATE_OPEN
+        self._retry_at = time.monotonic() + wait
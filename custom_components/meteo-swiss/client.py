@@ -0,0 +1,100 @@
+"""Download and parsing of Meteo Swiss forecasts and observations."""
+import json
+import logging
+import os
+
+import aiohttp
+
+from typing import Any, Mapping
+from urllib.parse import urlsplit
+
+from .forecast import ForecastSeries
+from .metrics import RequestTimings
+
+_LOGGER = logging.getLogger(__name__)
+
+FORECAST_URL = (
+    "https://app-prod-ws.meteoswiss-app.ch/v1/forecast"
+    "?plz={}00&graph=true&warning=true"
+)
+CURRENT_CONDITION_URL = (
+    "https://data.geo.admin.ch/ch.meteoschweiz.messwerte-aktuell/VQHA80.csv"
+)
+# Environment variable pointing every endpoint at another server, such
+# as the stand-in of the benchmarks, which serves the same paths.
+BASE_URL_VARIABLE = "METEOSWISS_BASE_URL"
+# Forcing headers to avoid 500 error when downloading files
+HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,"
+    "image/webp,*/*;q=0.8",
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/1337 Safari/537.36",
+}
+
+
+def endpoint(url: str) -> str:
+    """Return a Meteo Swiss URL, moved to the overriding server if any."""
+    base_url = os.environ.get(BASE_URL_VARIABLE)
+    if not base_url:
+        return url
+    parts = urlsplit(url)
+    url = base_url.rstrip("/") + parts.path
+    return url + "?" + parts.query if parts.query else url
+
+
+async def conditional_get(
+    session: aiohttp.ClientSession,
+    url: str,
+    etag: str | None,
+    last_modified: str | None,
+    timings: RequestTimings | None = None,
+) -> tuple[int, bytes, Mapping[str, str]]:
+    """GET a URL, letting the server answer 304 if it did not change.
+
+    Returns the status, the body and the headers of the response.  The
+    times of the phases of the request are recorded in timings, if
+    given, when the session traces them.
+    """
+    headers = dict(HEADERS)
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    _LOGGER.debug("Fetching %s", url)
+    kwargs = {} if timings is None else {"trace_request_ctx": timings}
+    async with session.get(url, headers=headers, **kwargs) as response:
+        if response.status == 304:
+            body = b""
+        else:
+            response.raise_for_status()
+            body = await response.read()
+        if timings is not None:
+            timings.mark("body_read")
+        return response.status, body, response.headers
+
+
+def parse_forecast(body: bytes) -> dict[str, Any]:
+    """Parse the forecast of a post code.
+
+    The hourly series of the "graph" are replaced by a ForecastSeries,
+    which is much smaller than the lists of floats JSON decodes to.
+    """
+    return forecast_from_json(json.loads(body))
+
+
+def forecast_from_json(data: dict[str, Any]) -> dict[str, Any]:
+    """Return a decoded forecast with its hourly series made compact."""
+    if data.get("graph"):
+        try:
+            data["graph"] = ForecastSeries(data["graph"])
+        except (KeyError, TypeError, ValueError):
+            _LOGGER.warning("Ignoring malformed hourly forecast")
+            data["graph"] = None
+    return data
+
+
+def forecast_to_json(data: dict[str, Any]) -> dict[str, Any]:
+    """Return a parsed forecast in JSON-serializable form."""
+    if isinstance(data.get("graph"), ForecastSeries):
+        data = {**data, "graph": data["graph"].as_graph()}
+    return data
@@ -4,19 +4,28 @@ import logging
 import re
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.core import callback
 from .const import (
     DOMAIN,
+    CONF_ALIGNED_POLLING,
     CONF_FORECAST_NAME,
+    CONF_FORECAST_UPDATE_INTERVAL,
     CONF_LAT,
     CONF_LON,
+    CONF_MAX_STALE_AGE,
     CONF_NAME,
     CONF_POSTCODE,
+    CONF_PUBLICATION_DELAY,
     CONF_REAL_TIME_NAME,
+    CONF_RECORD_PAYLOADS,
     CONF_STATION,
     CONF_UPDATE_INTERVAL,
+    CONF_VIRTUAL_STATION_SIZE,
+    DEFAULT_FORECAST_UPDATE_INTERVAL,
+    DEFAULT_OPTIONS,
     DEFAULT_UPDATE_INTERVAL,
+    MAX_VIRTUAL_STATION_SIZE,
 )
-from hamsclientfork import meteoSwissClient, StationType
 from homeassistant.helpers.issue_registry import IssueSeverity
 from homeassistant.helpers import issue_registry as ir
 from typing import Any
@@ -26,6 +35,10 @@ _LOGGER = logging.getLogger(__name__)
 
 
 NO_STATION = "No real-time weather station"
+NEAREST_STATIONS_SHOWN = 5
+# Beyond this distance, the location is not in Switzerland and no
+# postcode is guessed.
+MAX_POSTCODE_GUESS_DISTANCE = 25
 
 
 class MeteoSwissFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -40,7 +53,14 @@ class MeteoSwissFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         self._lon = None
         self._post_code = None
         self._forecast_name = None
-        self._update_interval = None
+        self._forecast_update_interval = None
+        self._stations = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return MeteoSwissOptionsFlowHandler()
 
     async def async_step_user(self, user_input=None):
         """Handle a flow initiated by the user."""
@@ -116,54 +136,47 @@ class MeteoSwissFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                         default=name,
                     ): str,
                     vol.Required(
-                        CONF_UPDATE_INTERVAL,
+                        CONF_FORECAST_UPDATE_INTERVAL,
                         default=interval,
                     ): int,
                 }
             )
 
-        client = await self.hass.async_add_executor_job(
-            meteoSwissClient,
-            "No display name",
-            user_input.get(CONF_POSTCODE) if user_input else None,
-        )
+        # Only needed while configuring, so not imported with the flow.
+        from .gazetteer import async_get_gazetteer
+
+        gazetteer = await async_get_gazetteer(self.hass)
 
         errors = {}
         if user_input is not None:
             if not re.match(r"^\d{4}$", str(user_input[CONF_POSTCODE])):
                 errors[CONF_POSTCODE] = "invalid_postcode"
+            elif int(user_input[CONF_POSTCODE]) not in gazetteer:
+                errors[CONF_POSTCODE] = "unknown_postcode"
             if not str(user_input[CONF_FORECAST_NAME]).strip():
                 errors[CONF_FORECAST_NAME] = "real_time_name_empty"
-            # check if the station name is 3 character
-            if user_input[CONF_UPDATE_INTERVAL] < 1:
-                errors[CONF_UPDATE_INTERVAL] = "update_interval_too_low"
+            if user_input[CONF_FORECAST_UPDATE_INTERVAL] < 1:
+                errors[CONF_FORECAST_UPDATE_INTERVAL] = (
+                    "update_interval_too_low"
+                )
 
             schema = data_schema(
                 user_input[CONF_POSTCODE],
                 user_input[CONF_FORECAST_NAME],
-                user_input[CONF_UPDATE_INTERVAL],
+                user_input[CONF_FORECAST_UPDATE_INTERVAL],
             )
         else:
-            geodata = await self.hass.async_add_executor_job(
-                client.getGeoData, self._lat, self._lon
-            )
-            guessed_postal_code = str(
-                geodata.get("address", {}).get(
-                    "postcode",
-                    "",
-                )
-            )
-            guessed_address = " ".join(
-                x.strip()
-                for x in str(geodata.get("display_name", "",)).split(
-                    ","
-                )[:3]
-            )
+            guessed_postal_code = ""
+            guessed_address = ""
+            nearest = gazetteer.nearest(self._lat, self._lon)
+            if nearest and nearest[0] <= MAX_POSTCODE_GUESS_DISTANCE:
+                guessed_postal_code = str(nearest[1])
+                guessed_address = gazetteer.name(nearest[1])
 
             schema = data_schema(
                 guessed_postal_code,
                 guessed_address,
-                DEFAULT_UPDATE_INTERVAL,
+                DEFAULT_FORECAST_UPDATE_INTERVAL,
             )
 
         if errors or user_input is None:
@@ -173,7 +186,9 @@ class MeteoSwissFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
         self._post_code = int(user_input[CONF_POSTCODE])
         self._forecast_name = user_input[CONF_FORECAST_NAME].strip()
-        self._update_interval = int(user_input[CONF_UPDATE_INTERVAL])
+        self._forecast_update_interval = int(
+            user_input[CONF_FORECAST_UPDATE_INTERVAL]
+        )
         _LOGGER.debug(
             "step user two: continuing with lat %s lon %s post %s name %s",
             self._lat,
@@ -183,35 +198,50 @@ class MeteoSwissFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         )
         return await self.async_step_user_three()
 
-    async def _get_all_stations_and_closest_one(self, client, lat, lon):
-        default_station = await self.hass.async_add_executor_job(
-            client.get_closest_station,
-            lat,
-            lon,
-            StationType.WEATHER,
-        )
-        if default_station:
-            default_station_name = await self.hass.async_add_executor_job(
-                client.get_station_name, default_station
-            )
-        else:
-            default_station_name = ""
-        stations = await self.hass.async_add_executor_job(
-            client.get_all_stations,
-            StationType.WEATHER,
-        )
-        all_stations = {NO_STATION: ""}
-        all_stations.update(
-            {
-                "%s (%s)"
-                % (
-                    value["name"],
+    async def _get_all_stations_and_closest_one(self, lat, lon):
+        if self._stations is None:
+            from .stations import STATION_TYPE_WEATHER, async_get_station_cache
+
+            cache = async_get_station_cache(self.hass)
+            stations = await cache.async_get(STATION_TYPE_WEATHER)
+            index = await cache.async_get_index(STATION_TYPE_WEATHER)
+            nearest = index.nearest(lat, lon, NEAREST_STATIONS_SHOWN)
+
+            # The closest stations come first, with their distance.
+            all_stations = {NO_STATION: ""}
+            for distance, key in nearest:
+                label = "%s (%s), %.1f km" % (
+                    stations[key]["name"],
                     key,
-                ): key
-                for key, value in stations.items()
-            }
-        )
-        return default_station, default_station_name, all_stations
+                    distance,
+                )
+                all_stations[label] = key
+            shown = {key for _, key in nearest}
+            all_stations.update(
+                {
+                    "%s (%s)"
+                    % (
+                        value["name"],
+                        key,
+                    ): key
+                    for key, value in stations.items()
+                    if key not in shown
+                }
+            )
+
+            if nearest:
+                default_station_name = stations[nearest[0][1]]["name"]
+                default_station_selection = list(all_stations)[1]
+            else:
+                default_station_name = ""
+                default_station_selection = NO_STATION
+            # Kept for the resubmissions of the form.
+            self._stations = (
+                default_station_name,
+                default_station_selection,
+                all_stations,
+            )
+        return self._stations
 
     async def async_step_user_three(self, user_input=None):
         """Handle the final step of setup."""
@@ -222,7 +252,7 @@ class MeteoSwissFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             self._post_code,
         )
 
-        def data_schema(name, station, stations):
+        def data_schema(name, station, stations, interval):
             return vol.Schema(
                 {
                     vol.Required(
@@ -233,24 +263,25 @@ class MeteoSwissFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                         CONF_REAL_TIME_NAME,
                         default=name,
                     ): str,
+                    vol.Required(
+                        CONF_UPDATE_INTERVAL,
+                        default=interval,
+                    ): int,
                 }
             )
 
-        client = await self.hass.async_add_executor_job(
-            meteoSwissClient,
-            "No display name",
-            self._post_code,
-        )
-
-        (
-            default_station,
-            default_station_name,
-            stations,
-        ) = await self._get_all_stations_and_closest_one(
-            client,
-            self._lat,
-            self._lon,
-        )
+        try:
+            (
+                default_station_name,
+                default_station_selection,
+                stations,
+            ) = await self._get_all_stations_and_closest_one(
+                self._lat,
+                self._lon,
+            )
+        except Exception:
+            _LOGGER.exception("Could not obtain the list of stations")
+            return self.async_abort(reason="unknown")
 
         errors = {}
         if user_input is not None:
@@ -268,6 +299,9 @@ class MeteoSwissFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 if not re.match(r"^\w{3}$", station):
                     errors[CONF_STATION] = "invalid_station_name"
 
+                if user_input[CONF_UPDATE_INTERVAL] < 1:
+                    errors[CONF_UPDATE_INTERVAL] = "update_interval_too_low"
+
             else:
                 station = None
                 real_time_name = None
@@ -276,21 +310,14 @@ class MeteoSwissFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 user_input[CONF_REAL_TIME_NAME],
                 user_input[CONF_STATION],
                 stations,
+                user_input[CONF_UPDATE_INTERVAL],
             )
         else:
-            if default_station:
-                default_station_selection = "%s (%s)" % (
-                    default_station_name,
-                    default_station,
-                )
-            else:
-                default_station_selection = NO_STATION
-            default_station_name = default_station_name or ""
-
             schema = data_schema(
                 default_station_name,
                 default_station_selection,
                 stations,
+                DEFAULT_UPDATE_INTERVAL,
             )
 
         if errors or user_input is None:
@@ -301,13 +328,16 @@ class MeteoSwissFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         data = {
             CONF_POSTCODE: self._post_code,
             CONF_FORECAST_NAME: self._forecast_name,
-            CONF_UPDATE_INTERVAL: self._update_interval,
+            CONF_FORECAST_UPDATE_INTERVAL: self._forecast_update_interval,
         }
         if station and real_time_name:
             data.update(
                 {
                     CONF_STATION: station,
                     CONF_REAL_TIME_NAME: real_time_name,
+                    CONF_UPDATE_INTERVAL: int(
+                        user_input[CONF_UPDATE_INTERVAL]
+                    ),
                 }
             )
 
@@ -352,3 +382,102 @@ class MeteoSwissFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             title=data[CONF_NAME],
             data=data,
         )
+
+
+class MeteoSwissOptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the polling settings of an existing entry."""
+
+    def _current(self, key):
+        return self.config_entry.options.get(
+            key,
+            self.config_entry.data.get(key, DEFAULT_OPTIONS[key]),
+        )
+
+    async def async_step_init(self, user_input=None):
+        """Manage the polling settings."""
+
+        def data_schema(
+            forecast_interval,
+            real_time_interval,
+            aligned_polling,
+            publication_delay,
+            max_stale_age,
+            virtual_station_size,
+            record_payloads,
+        ):
+            return vol.Schema(
+                {
+                    vol.Required(
+                        CONF_FORECAST_UPDATE_INTERVAL,
+                        default=forecast_interval,
+                    ): int,
+                    vol.Required(
+                        CONF_UPDATE_INTERVAL,
+                        default=real_time_interval,
+                    ): int,
+                    vol.Required(
+                        CONF_ALIGNED_POLLING,
+                        default=aligned_polling,
+                    ): bool,
+                    vol.Required(
+                        CONF_PUBLICATION_DELAY,
+                        default=publication_delay,
+                    ): int,
+                    vol.Required(
+                        CONF_MAX_STALE_AGE,
+                        default=max_stale_age,
+                    ): int,
+                    vol.Required(
+                        CONF_VIRTUAL_STATION_SIZE,
+                        default=virtual_station_size,
+                    ): int,
+                    vol.Required(
+                        CONF_RECORD_PAYLOADS,
+                        default=record_payloads,
+                    ): bool,
+                }
+            )
+
+        errors = {}
+        if user_input is not None:
+            for key in (CONF_FORECAST_UPDATE_INTERVAL, CONF_UPDATE_INTERVAL):
+                if user_input[key] < 1:
+                    errors[key] = "update_interval_too_low"
+            if not 0 <= user_input[CONF_PUBLICATION_DELAY] < 600:
+                errors[CONF_PUBLICATION_DELAY] = "publication_delay_invalid"
+            if user_input[CONF_MAX_STALE_AGE] < 0:
+                errors[CONF_MAX_STALE_AGE] = "max_stale_age_invalid"
+            if not (
+                0
+                <= user_input[CONF_VIRTUAL_STATION_SIZE]
+                <= MAX_VIRTUAL_STATION_SIZE
+            ):
+                errors[CONF_VIRTUAL_STATION_SIZE] = (
+                    "virtual_station_size_invalid"
+                )
+            schema = data_schema(
+                user_input[CONF_FORECAST_UPDATE_INTERVAL],
+                user_input[CONF_UPDATE_INTERVAL],
+                user_input[CONF_ALIGNED_POLLING],
+                user_input[CONF_PUBLICATION_DELAY],
+                user_input[CONF_MAX_STALE_AGE],
+                user_input[CONF_VIRTUAL_STATION_SIZE],
+                user_input[CONF_RECORD_PAYLOADS],
+            )
+        else:
+            schema = data_schema(
+                self._current(CONF_FORECAST_UPDATE_INTERVAL),
+                self._current(CONF_UPDATE_INTERVAL),
+                self._current(CONF_ALIGNED_POLLING),
+                self._current(CONF_PUBLICATION_DELAY),
+                self._current(CONF_MAX_STALE_AGE),
+                self._current(CONF_VIRTUAL_STATION_SIZE),
+                self._current(CONF_RECORD_PAYLOADS),
+            )
+
+        if errors or user_input is None:
+            return self.async_show_form(
+                step_id="init", data_schema=schema, errors=errors
+            )
+
+        return self.async_create_entry(title="", data=user_input)
@@ -1,15 +1,6 @@
 """Constants for Meteo Swiss."""
 
-from homeassistant.const import (
-    CONF_NAME,
-    DEGREE,
-    IRRADIATION_WATTS_PER_SQUARE_METER,
-    PERCENTAGE,
-    PRESSURE_HPA,
-    SPEED_KILOMETERS_PER_HOUR,
-    TEMP_CELSIUS,
-    TIME_MINUTES,
-)
+from homeassistant.const import CONF_NAME
 
 DOMAIN = "meteo-swiss"
 CONF_FORECAST_NAME = "forecast_name"
@@ -19,10 +10,45 @@ CONF_REAL_TIME_NAME = "real_time_name"
 CONF_STATION = "station"
 CONF_FORECASTTYPE = "forecasttype"
 CONF_UPDATE_INTERVAL = "update_interval"
+CONF_FORECAST_UPDATE_INTERVAL = "forecast_update_interval"
+CONF_ALIGNED_POLLING = "aligned_polling"
+CONF_PUBLICATION_DELAY = "publication_delay"
+CONF_MAX_STALE_AGE = "max_stale_age"
+CONF_RECORD_PAYLOADS = "record_payloads"
+CONF_VIRTUAL_STATION_SIZE = "virtual_station_size"
 CONF_LAT = "latitude"
 CONF_LON = "longitude"
 
 DEFAULT_UPDATE_INTERVAL = 5
+DEFAULT_FORECAST_UPDATE_INTERVAL = 60
+# Seconds after each 10-minute boundary before SwissMetNet observations
+# are usually published.
+DEFAULT_PUBLICATION_DELAY = 180
+# Minutes for which the last good data is shown while updates fail.
+DEFAULT_MAX_STALE_AGE = 120
+# Most stations a virtual station is interpolated from.
+MAX_VIRTUAL_STATION_SIZE = 10
+DEFAULT_OPTIONS = {
+    CONF_UPDATE_INTERVAL: DEFAULT_UPDATE_INTERVAL,
+    CONF_FORECAST_UPDATE_INTERVAL: DEFAULT_FORECAST_UPDATE_INTERVAL,
+    CONF_ALIGNED_POLLING: False,
+    CONF_PUBLICATION_DELAY: DEFAULT_PUBLICATION_DELAY,
+    CONF_MAX_STALE_AGE: DEFAULT_MAX_STALE_AGE,
+    CONF_RECORD_PAYLOADS: False,
+    # Observations of the station chosen only.
+    CONF_VIRTUAL_STATION_SIZE: 0,
+}
+
+# State attributes telling the age of the data shown
+ATTR_FORECAST_FETCHED = "forecast_fetched_at"
+ATTR_OBSERVATION_TIME = "observation_time"
+ATTR_STALE = "stale"
+
+# Keys of the process-wide helpers in hass.data[DOMAIN]
+DATA_HUB = "hub"
+DATA_STATIONS = "stations"
+DATA_GAZETTEER = "gazetteer"
+DATA_SNAPSHOTS = "snapshots"
 
 # Mapping for conditions vs icon ID of meteoswiss
 # ID < 100 for day icons
@@ -45,95 +71,15 @@ CONDITION_CLASSES = {
     "windy-variant": [],
     "exceptional": [],
 }
-
-SENSOR_TYPE_NAME = "name"
-SENSOR_TYPE_UNIT = "unit"
-SENSOR_TYPE_ICON = "icon"
-SENSOR_TYPE_CLASS = "device_class"
-SENSOR_DATA_ID = "msDataId"
-SENSOR_TYPES = {
-    "temperature": {
-        SENSOR_TYPE_NAME: "temperature",
-        SENSOR_TYPE_UNIT: TEMP_CELSIUS,
-        SENSOR_TYPE_ICON: "mdi:thermometer",
-        SENSOR_TYPE_CLASS: "temperature",
-        SENSOR_DATA_ID: "tre200s0",
-    },
-    "10minrain": {
-        SENSOR_TYPE_NAME: "10 minute rain",
-        SENSOR_TYPE_UNIT: "mm",
-        SENSOR_TYPE_ICON: "mdi:water",
-        SENSOR_TYPE_CLASS: None,
-        SENSOR_DATA_ID: "rre150z0",
-    },
-    "10minsun": {
-        SENSOR_TYPE_NAME: "10 minute sun",
-        SENSOR_TYPE_UNIT: TIME_MINUTES,
-        SENSOR_TYPE_ICON: "mdi:weather-sunny",
-        SENSOR_TYPE_CLASS: None,
-        SENSOR_DATA_ID: "sre000z0",
-    },
-    "sun_radiant": {
-        SENSOR_TYPE_NAME: "sun irradiation",
-        SENSOR_TYPE_UNIT: IRRADIATION_WATTS_PER_SQUARE_METER,
-        SENSOR_TYPE_ICON: "mdi:weather-sunny",
-        SENSOR_TYPE_CLASS: None,
-        SENSOR_DATA_ID: "gre000z0",
-    },
-    "humidity": {
-        SENSOR_TYPE_NAME: "humidity",
-        SENSOR_TYPE_UNIT: PERCENTAGE,
-        SENSOR_TYPE_ICON: "mdi:water-percent",
-        SENSOR_TYPE_CLASS: None,
-        SENSOR_DATA_ID: "ure200s0",
-    },
-    "dew_point": {
-        SENSOR_TYPE_NAME: "dew point",
-        SENSOR_TYPE_UNIT: TEMP_CELSIUS,
-        SENSOR_TYPE_ICON: "mdi:weather-fog",
-        SENSOR_TYPE_CLASS: None,
-        SENSOR_DATA_ID: "tde200s0",
-    },
-    "wind_direction": {
-        SENSOR_TYPE_NAME: "wind direction",
-        SENSOR_TYPE_UNIT: DEGREE,
-        SENSOR_TYPE_ICON: "mdi:compass-rose",
-        SENSOR_TYPE_CLASS: None,
-        SENSOR_DATA_ID: "dkl010z0",
-    },
-    "wind_speed": {
-        SENSOR_TYPE_NAME: "wind speed",
-        SENSOR_TYPE_UNIT: SPEED_KILOMETERS_PER_HOUR,
-        SENSOR_TYPE_ICON: "mdi:weather-windy",
-        SENSOR_TYPE_CLASS: None,
-        SENSOR_DATA_ID: "fu3010z0",
-    },
-    "wind_speed_max": {
-        SENSOR_TYPE_NAME: "wind speed max",
-        SENSOR_TYPE_UNIT: SPEED_KILOMETERS_PER_HOUR,
-        SENSOR_TYPE_ICON: "mdi:weather-windy",
-        SENSOR_TYPE_CLASS: None,
-        SENSOR_DATA_ID: "fu3010z1",
-    },
-    "pressure": {
-        SENSOR_TYPE_NAME: "pressure",
-        SENSOR_TYPE_UNIT: PRESSURE_HPA,
-        SENSOR_TYPE_ICON: "mdi:gauge",
-        SENSOR_TYPE_CLASS: None,
-        SENSOR_DATA_ID: "prestas0",
-    },
-    "pressure_qff": {
-        SENSOR_TYPE_NAME: "pressure QFF",
-        SENSOR_TYPE_UNIT: PRESSURE_HPA,
-        SENSOR_TYPE_ICON: "mdi:gauge",
-        SENSOR_TYPE_CLASS: None,
-        SENSOR_DATA_ID: "pp0qffs0",
-    },
-    "pressure_qnh": {
-        SENSOR_TYPE_NAME: "pressure QNH",
-        SENSOR_TYPE_UNIT: PRESSURE_HPA,
-        SENSOR_TYPE_ICON: "mdi:gauge",
-        SENSOR_TYPE_CLASS: None,
-        SENSOR_DATA_ID: "pp0qnhs0",
-    },
-}
+# Condition of icon IDs missing from CONDITION_CLASSES.
+CONDITION_UNKNOWN = None
+# Dense table of the condition of every icon ID, indexed by the ID.
+ICON_CONDITIONS: tuple[str | None, ...] = tuple(
+    next(
+        (k for k, v in CONDITION_CLASSES.items() if icon in v),
+        CONDITION_UNKNOWN,
+    )
+    for icon in range(
+        max(icon for v in CONDITION_CLASSES.values() for icon in v) + 1
+    )
+)
@@ -0,0 +1,34 @@
+"""Diagnostics of Meteo Swiss entries."""
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import MeteoSwissEntryData
+from .const import DOMAIN
+from .weather import UNKNOWN_ICONS
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+) -> dict[str, Any]:
+    """Return the settings of an entry and how its updates go.
+
+    Request timings, payload sizes and failures are those of the
+    fetchers, which entries following the same post code or reading
+    the national file share.  Unknown icon IDs are counted over all
+    entries, since Home Assistant started.
+    """
+    d: MeteoSwissEntryData = hass.data[DOMAIN][entry.entry_id]
+    archive = d.forecast.hub.archive
+    return {
+        "data": dict(entry.data),
+        "options": dict(entry.options),
+        "recording_to": archive and str(archive.folder),
+        "forecast": d.forecast.diagnostics(),
+        "real_time": d.real_time and d.real_time.diagnostics(),
+        "unknown_icons": {
+            str(icon): count for icon, count in UNKNOWN_ICONS.items()
+        },
+    }
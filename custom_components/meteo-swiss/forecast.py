@@ -0,0 +1,116 @@
+"""Compact hourly series of the Meteo Swiss forecast."""
+import math
+
+from array import array
+from typing import Any, Iterator
+
+HOUR_MS = 60 * 60 * 1000
+LOW_RESOLUTION_MS = 3 * HOUR_MS
+# Icon stored where the forecast has none.
+NO_ICON = -1
+
+
+def _floats(values: list[Any] | None) -> array:
+    return array(
+        "f",
+        (math.nan if v is None else v for v in values or ()),
+    )
+
+
+def _at(values: array, i: int) -> float | None:
+    if not 0 <= i < len(values) or math.isnan(values[i]):
+        return None
+    # Single precision; the forecast has no more than two decimals.
+    return round(values[i], 2)
+
+
+def _json(values: array) -> list[float | None]:
+    return [_at(values, i) for i in range(len(values))]
+
+
+class ForecastSeries:
+    """Hourly forecast series, one typed array per quantity.
+
+    Temperatures are hourly, and icons and wind given every three hours,
+    from the start of the forecast.  Hourly precipitation starts later,
+    at the start of the low resolution part.  Missing values are stored
+    as NaN, and missing icons as NO_ICON.
+    """
+
+    __slots__ = (
+        "start",
+        "temperature",
+        "precipitation",
+        "start_low_resolution",
+        "icon",
+        "wind_direction",
+        "wind_speed",
+    )
+
+    def __init__(self, graph: dict[str, Any]) -> None:
+        """Keep the series of interest of the forecast graph."""
+        self.start: int = graph["start"]
+        self.temperature = _floats(graph.get("temperatureMean1h"))
+        self.precipitation = _floats(graph.get("precipitation1h"))
+        self.start_low_resolution: int = graph.get(
+            "startLowResolution",
+            self.start,
+        )
+        self.icon = array(
+            "h",
+            (
+                NO_ICON if v is None else v
+                for v in graph.get("weatherIcon3h") or ()
+            ),
+        )
+        self.wind_direction = _floats(graph.get("windDirection3h"))
+        self.wind_speed = _floats(graph.get("windSpeed3h"))
+
+    def as_graph(self) -> dict[str, Any]:
+        """Return the series in the JSON form they were parsed from."""
+        return {
+            "start": self.start,
+            "temperatureMean1h": _json(self.temperature),
+            "precipitation1h": _json(self.precipitation),
+            "startLowResolution": self.start_low_resolution,
+            "weatherIcon3h": [
+                None if v == NO_ICON else v for v in self.icon
+            ],
+            "windDirection3h": _json(self.wind_direction),
+            "windSpeed3h": _json(self.wind_speed),
+        }
+
+    def __len__(self) -> int:
+        """Return the number of hours forecast."""
+        return len(self.temperature)
+
+    def index(self, time_ms: int) -> int:
+        """Return the index of the hour containing a time."""
+        return min(max((time_ms - self.start) // HOUR_MS, 0), len(self))
+
+    def hours(
+        self,
+        first: int = 0,
+    ) -> Iterator[
+        tuple[int, float | None, float | None, int, float | None, float | None]
+    ]:
+        """Yield the forecast of each hour from the given index on.
+
+        Hours are (time, temperature, precipitation, icon, wind direction,
+        wind speed) tuples.  Three-hourly values are those of the period
+        containing the hour; precipitation is None before it starts.
+        """
+        # Hours between the start of the forecast and that of the hourly
+        # precipitation.
+        offset = (self.start_low_resolution - self.start) // HOUR_MS
+        for i in range(first, len(self)):
+            time_ms = self.start + i * HOUR_MS
+            j = i * HOUR_MS // LOW_RESOLUTION_MS
+            yield (
+                time_ms,
+                _at(self.temperature, i),
+                _at(self.precipitation, i - offset),
+                self.icon[j] if 0 <= j < len(self.icon) else NO_ICON,
+                _at(self.wind_direction, j),
+                _at(self.wind_speed, j),
+            )
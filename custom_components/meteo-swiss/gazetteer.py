@@ -0,0 +1,99 @@
+"""Offline gazetteer of Swiss and Liechtenstein postcodes."""
+import asyncio
+import csv
+import gzip
+import io
+import logging
+
+from pathlib import Path
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_GAZETTEER, DOMAIN
+from .geo import PointIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+# Swiss and Liechtenstein postcodes, which Meteo Swiss forecasts for,
+# with locality names and coordinates from GeoNames (CC BY 4.0).
+# Localities are placed by name within the canton of the
+# postcode, and left out where that name is shared; postcodes whose
+# locality could not be placed have no coordinates.  They are valid,
+# but never guessed from a location.
+POSTCODE_FILE = Path(__file__).parent / "postcodes.csv.gz"
+
+
+class Gazetteer:
+    """Postcodes with their locality, searchable by location."""
+
+    def __init__(
+        self,
+        names: dict[int, str],
+        points: list[tuple[int, float, float]],
+    ) -> None:
+        """Initialize."""
+        self._names = names
+        self._index: PointIndex[int] = PointIndex(points)
+
+    @classmethod
+    def parse(cls, body: bytes) -> "Gazetteer":
+        """Parse the gzipped, semicolon-separated postcode file."""
+        reader = csv.DictReader(
+            io.StringIO(gzip.decompress(body).decode("utf-8")),
+            delimiter=";",
+        )
+        names = {}
+        points = []
+        for line in reader:
+            postcode = int(line["postcode"])
+            names[postcode] = line["name"]
+            if line["latitude"] and line["longitude"]:
+                points.append(
+                    (
+                        postcode,
+                        float(line["latitude"]),
+                        float(line["longitude"]),
+                    )
+                )
+        _LOGGER.debug(
+            "Loaded %s postcodes, %s of them located",
+            len(names),
+            len(points),
+        )
+        return cls(names, points)
+
+    @classmethod
+    def load(cls) -> "Gazetteer":
+        """Load the bundled postcode file.  This is blocking."""
+        return cls.parse(POSTCODE_FILE.read_bytes())
+
+    def __len__(self) -> int:
+        """Return the number of postcodes."""
+        return len(self._names)
+
+    def __contains__(self, postcode: int) -> bool:
+        """Return whether a postcode exists."""
+        return postcode in self._names
+
+    def name(self, postcode: int) -> str | None:
+        """Return the locality of a postcode."""
+        return self._names.get(postcode)
+
+    def nearest(self, lat: float, lon: float) -> tuple[float, int] | None:
+        """Return the (distance in km, postcode) closest to a location."""
+        found = self._index.nearest(lat, lon)
+        return found[0] if found else None
+
+
+async def async_get_gazetteer(hass: HomeAssistant) -> Gazetteer:
+    """Return the gazetteer, loading it in the executor on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_GAZETTEER not in domain_data:
+        # Concurrent callers wait for the same load.
+        domain_data[DATA_GAZETTEER] = hass.async_add_executor_job(
+            Gazetteer.load
+        )
+    try:
+        return await asyncio.shield(domain_data[DATA_GAZETTEER])
+    except Exception:
+        domain_data.pop(DATA_GAZETTEER, None)
+        raise
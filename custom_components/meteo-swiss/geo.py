@@ -0,0 +1,118 @@
+"""Great-circle distances and nearest-point search."""
+import math
+
+from collections import defaultdict
+from typing import Generic, Iterable, TypeVar
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+# Great-circle distances are a hair shorter than the distances along
+# parallels used to bound the search; this keeps the bound safe.
+BOUND_SLACK = 0.99
+
+T = TypeVar("T")
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Return the great-circle distance in km between two points."""
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    a = (
+        math.sin((p2 - p1) / 2) ** 2
+        + math.cos(p1)
+        * math.cos(p2)
+        * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class PointIndex(Generic[T]):
+    """Grid of points on the sphere answering nearest-k queries.
+
+    Points are bucketed into cells of a fixed size in degrees.  A query
+    scans rings of cells around its own cell, and stops as soon as no
+    point beyond the scanned rings can be closer than the k-th best.
+    """
+
+    def __init__(
+        self,
+        points: Iterable[tuple[T, float, float]],
+        cell: float = 0.25,
+    ) -> None:
+        """Index (key, latitude, longitude) triples."""
+        self.cell = cell
+        cells = defaultdict(list)
+        for key, lat, lon in points:
+            p = math.radians(lat)
+            cells[self._cell_of(lat, lon)].append(
+                (key, p, math.radians(lon), math.cos(p))
+            )
+        self._cells: dict[tuple[int, int], list] = dict(cells)
+        if self._cells:
+            rows = [i for i, _ in self._cells]
+            cols = [j for _, j in self._cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+        self._size = sum(len(c) for c in self._cells.values())
+
+    def __len__(self) -> int:
+        """Return the number of points."""
+        return self._size
+
+    def _cell_of(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell), math.floor(lon / self.cell)
+
+    def _ring(self, i0: int, j0: int, r: int) -> Iterable[tuple[int, int]]:
+        if r == 0:
+            yield i0, j0
+            return
+        for j in range(j0 - r, j0 + r + 1):
+            yield i0 - r, j
+            yield i0 + r, j
+        for i in range(i0 - r + 1, i0 + r):
+            yield i, j0 - r
+            yield i, j0 + r
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 1,
+    ) -> list[tuple[float, T]]:
+        """Return up to k (distance in km, key) pairs, closest first."""
+        if not self._cells or k < 1:
+            return []
+        i0, j0 = self._cell_of(lat, lon)
+        min_i, max_i, min_j, max_j = self._bounds
+        last_ring = max(i0 - min_i, max_i - i0, j0 - min_j, max_j - j0, 0)
+        p = math.radians(lat)
+        lam = math.radians(lon)
+        cos_p = math.cos(p)
+        found: list[tuple[float, T]] = []
+        cells = self._cells
+        for r in range(last_ring + 1):
+            for c in self._ring(i0, j0, r):
+                for key, p2, lam2, cos_p2 in cells.get(c, ()):
+                    a = (
+                        math.sin((p2 - p) / 2) ** 2
+                        + cos_p * cos_p2 * math.sin((lam2 - lam) / 2) ** 2
+                    )
+                    found.append(
+                        (2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a)), key)
+                    )
+            if len(found) >= k:
+                found.sort(key=lambda f: f[0])
+                del found[k:]
+                # Anything outside the scanned rings is at least r cells
+                # away in latitude or in longitude.
+                reach = r * self.cell
+                widest = min(abs(lat) + reach, 90)
+                bound = (
+                    reach
+                    * KM_PER_DEGREE
+                    * math.cos(math.radians(widest))
+                    * BOUND_SLACK
+                )
+                if found[-1][0] <= bound:
+                    break
+        found.sort(key=lambda f: f[0])
+        return found[:k]
@@ -0,0 +1,296 @@
+"""Recent observations of a station, with aggregates kept up to date."""
+import abc
+import datetime
+import math
+
+from array import array
+from collections import deque
+from typing import Any, Callable
+
+from .observations import Observation
+
+# SwissMetNet stations publish one sample every 10 minutes, each
+# covering the 10 minutes up to its time.
+SAMPLE_PERIOD = 10 * 60
+# Two days of samples.
+CAPACITY = 2 * 24 * 60 * 60 // SAMPLE_PERIOD
+HISTORY_FIELDS = ("precipitation", "sunshine", "pressure", "wind_gust")
+
+
+def rolling(seconds: int) -> Callable[[int], int]:
+    """Return a window covering the given number of seconds."""
+    return lambda t: t - seconds
+
+
+def since_midnight(tz: datetime.tzinfo) -> Callable[[int], int]:
+    """Return a window covering the local day of each sample.
+
+    The sample made at midnight covers the last minutes of the day
+    before, so that day stays complete until the next sample.
+    """
+
+    def start_of(t: int) -> int:
+        day = datetime.datetime.fromtimestamp(t - 1, tz).date()
+        midnight = datetime.datetime.combine(day, datetime.time(), tz)
+        return int(midnight.timestamp())
+
+    return start_of
+
+
+class ObservationHistory:
+    """Fixed-size ring buffer of the samples of one station.
+
+    Samples are kept in one typed array per field of HISTORY_FIELDS,
+    missing values as NaN, the oldest being overwritten once full.
+    Aggregates over windows of the buffer are updated as each sample
+    comes in, in constant amortized time, so that reading them costs
+    nothing.
+    """
+
+    __slots__ = ("capacity", "times", "values", "end", "aggregates")
+
+    def __init__(
+        self,
+        tz: datetime.tzinfo = datetime.timezone.utc,
+        capacity: int = CAPACITY,
+    ) -> None:
+        """Initialize."""
+        self.capacity = capacity
+        self.times = array("q", [0]) * capacity
+        self.values = {
+            field: array("f", [math.nan]) * capacity
+            for field in HISTORY_FIELDS
+        }
+        # Number of samples appended so far.  Samples are numbered in
+        # order; sample i is stored in slot i % capacity.
+        self.end = 0
+        self.aggregates: dict[str, Aggregate] = {
+            "precipitation_1h": WindowSum("precipitation", rolling(3600)),
+            "precipitation_24h": WindowSum(
+                "precipitation",
+                rolling(24 * 3600),
+            ),
+            "sunshine_today": WindowSum("sunshine", since_midnight(tz)),
+            "pressure_tendency_3h": WindowChange("pressure", 3 * 3600),
+            "wind_gust_max_today": WindowMax(
+                "wind_gust",
+                since_midnight(tz),
+            ),
+        }
+
+    def __len__(self) -> int:
+        """Return the number of samples held."""
+        return min(self.end, self.capacity)
+
+    @property
+    def oldest(self) -> int:
+        """Return the number of the oldest sample held."""
+        return max(self.end - self.capacity, 0)
+
+    def time(self, i: int) -> int:
+        """Return the time of a sample, in seconds since the epoch."""
+        return self.times[i % self.capacity]
+
+    def value(self, field: str, i: int) -> float:
+        """Return one value of a sample, NaN if missing."""
+        return self.values[field][i % self.capacity]
+
+    @property
+    def last_time(self) -> int | None:
+        """Return the time of the latest sample, if any."""
+        return self.time(self.end - 1) if self.end else None
+
+    def append(self, observation: Observation) -> bool:
+        """Add the sample of an observation newer than the latest one.
+
+        Returns whether the observation was added.
+        """
+        if observation.time is None:
+            return False
+        t = int(observation.time.timestamp())
+        last = self.last_time
+        if last is not None and t <= last:
+            return False
+        self._append(
+            t,
+            {
+                field: getattr(observation, field)
+                for field in HISTORY_FIELDS
+            },
+        )
+        return True
+
+    def _append(self, t: int, values: dict[str, float | None]) -> None:
+        i = self.end
+        for aggregate in self.aggregates.values():
+            aggregate.advance(self, t, i)
+        slot = i % self.capacity
+        self.times[slot] = t
+        for field, column in self.values.items():
+            v = values.get(field)
+            column[slot] = math.nan if v is None else v
+        self.end = i + 1
+        for aggregate in self.aggregates.values():
+            aggregate.add(self, i)
+
+    def aggregate(self, name: str) -> float | None:
+        """Return the current value of an aggregate, None if unknown."""
+        return self.aggregates[name].result(self)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the samples in JSON-serializable form, oldest first."""
+        samples = range(self.oldest, self.end)
+        data: dict[str, Any] = {"times": [self.time(i) for i in samples]}
+        for field in HISTORY_FIELDS:
+            data[field] = [
+                None if math.isnan(v) else round(v, 2)
+                for v in (self.value(field, i) for i in samples)
+            ]
+        return data
+
+    def load(self, data: dict[str, Any]) -> None:
+        """Append the samples of what as_dict returned."""
+        last = self.last_time
+        for j, t in enumerate(data["times"]):
+            if last is not None and t <= last:
+                continue
+            self._append(
+                t,
+                {field: data[field][j] for field in HISTORY_FIELDS},
+            )
+            last = t
+
+
+class Aggregate(abc.ABC):
+    """Aggregate of one field over the samples of a sliding window.
+
+    Samples leave the window from the oldest on, as it slides forward
+    with each new sample.
+    """
+
+    __slots__ = ("field", "start_of", "start", "first")
+
+    def __init__(self, field: str, start_of: Callable[[int], int]) -> None:
+        """Initialize."""
+        self.field = field
+        self.start_of = start_of
+        # Samples from first on, with a time after start, are in the
+        # window.
+        self.start = 0
+        self.first = 0
+
+    def advance(self, history: ObservationHistory, t: int, i: int) -> None:
+        """Slide the window before sample i, made at t, comes in."""
+        self.start = self.start_of(t)
+        # Samples about to be overwritten leave the window as well.
+        oldest = i + 1 - history.capacity
+        first = self.first
+        while first < i and (
+            first < oldest or history.time(first) <= self.start
+        ):
+            self._remove(history, first)
+            first += 1
+        self.first = first
+
+    def add(self, history: ObservationHistory, i: int) -> None:
+        """Take the new sample i into account."""
+
+    def _remove(self, history: ObservationHistory, i: int) -> None:
+        """Stop taking sample i into account."""
+
+    def complete(self, history: ObservationHistory) -> bool:
+        """Return whether the samples held cover the whole window."""
+        return bool(history.end) and (
+            history.time(history.oldest) <= self.start + SAMPLE_PERIOD
+        )
+
+    @abc.abstractmethod
+    def result(self, history: ObservationHistory) -> float | None:
+        """Return the aggregate, None when unknown."""
+
+
+class WindowSum(Aggregate):
+    """Total of a field over a window; missing values count as zero."""
+
+    __slots__ = ("total",)
+
+    def __init__(self, field: str, start_of: Callable[[int], int]) -> None:
+        """Initialize."""
+        super().__init__(field, start_of)
+        self.total = 0.0
+
+    def add(self, history: ObservationHistory, i: int) -> None:
+        """Add sample i to the total."""
+        v = history.value(self.field, i)
+        if not math.isnan(v):
+            self.total += v
+
+    def _remove(self, history: ObservationHistory, i: int) -> None:
+        v = history.value(self.field, i)
+        if not math.isnan(v):
+            self.total -= v
+
+    def result(self, history: ObservationHistory) -> float | None:
+        """Return the total, None until the window is covered."""
+        if not self.complete(history):
+            return None
+        # Guards against rounding drift from adding and subtracting.
+        return max(round(self.total, 1), 0.0)
+
+
+class WindowMax(Aggregate):
+    """Maximum of a field over a window."""
+
+    __slots__ = ("_candidates",)
+
+    def __init__(self, field: str, start_of: Callable[[int], int]) -> None:
+        """Initialize."""
+        super().__init__(field, start_of)
+        # Samples that may still become the maximum, with decreasing
+        # values, the current maximum first.
+        self._candidates: deque[int] = deque()
+
+    def add(self, history: ObservationHistory, i: int) -> None:
+        """Make sample i a candidate, dropping the smaller ones."""
+        v = history.value(self.field, i)
+        if math.isnan(v):
+            return
+        candidates = self._candidates
+        while candidates and history.value(self.field, candidates[-1]) <= v:
+            candidates.pop()
+        candidates.append(i)
+
+    def _remove(self, history: ObservationHistory, i: int) -> None:
+        if self._candidates and self._candidates[0] == i:
+            self._candidates.popleft()
+
+    def result(self, history: ObservationHistory) -> float | None:
+        """Return the maximum, None until the window is covered."""
+        if not self._candidates or not self.complete(history):
+            return None
+        return round(history.value(self.field, self._candidates[0]), 1)
+
+
+class WindowChange(Aggregate):
+    """Change of a field over a fixed duration."""
+
+    __slots__ = ("seconds",)
+
+    def __init__(self, field: str, seconds: int) -> None:
+        """Initialize."""
+        # The sample made exactly that long ago is the first one kept.
+        super().__init__(field, rolling(seconds + 1))
+        self.seconds = seconds
+
+    def result(self, history: ObservationHistory) -> float | None:
+        """Return the latest value minus the one from the duration ago."""
+        last = history.end - 1
+        if last < 0 or self.first >= last:
+            return None
+        if history.time(self.first) != history.time(last) - self.seconds:
+            return None
+        change = history.value(self.field, last) - history.value(
+            self.field,
+            self.first,
+        )
+        return None if math.isnan(change) else round(change, 1)
@@ -0,0 +1,368 @@
+"""Process-wide fetch hub shared by all Meteo Swiss config entries."""
+import asyncio
+import hashlib
+import logging
+import time
+
+import aiohttp
+
+from async_timeout import timeout
+from typing import Any, Callable
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.issue_registry import IssueSeverity
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.util import dt as dt_util
+
+from .breaker import CircuitBreaker, CircuitOpenError
+from .client import (
+    CURRENT_CONDITION_URL,
+    FORECAST_URL,
+    conditional_get,
+    endpoint,
+    parse_forecast,
+)
+from .const import DOMAIN
+from .metrics import FetchStats, RequestTimings, trace_config
+from .observations import ObservationTable
+from .recording import RECORDING_FOLDER, PayloadArchive, RecordedResponse
+
+_LOGGER = logging.getLogger(__name__)
+# Each stream gets its own budget, so that a slow forecast endpoint
+# cannot starve real-time updates.
+FORECAST_TIMEOUT = 20
+REAL_TIME_TIMEOUT = 10
+
+
+class SharedFetcher:
+    """Reference-counted fetcher shared by every entry using the same key.
+
+    Concurrent callers share a single in-flight request, and callers that
+    arrive shortly after a successful fetch get its result back without
+    a new download.  Downloads are conditional on the ETag/Last-Modified
+    validators of the previous response, or compared by content hash when
+    the server sends none.  When the payload did not change, the previous
+    parsed object is returned as is, without parsing again.
+
+    Requests go through a circuit breaker, so that an endpoint that keeps
+    failing is only probed with backoff.  A repair issue is raised once
+    the backoff reaches its maximum, and withdrawn when the endpoint
+    answers again.
+
+    The time spent in each phase of the requests is kept in stats.  While
+    an archive is set, every response is recorded in it.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        key: tuple[str, Any],
+        url: str,
+        parse: Callable[[bytes], Any],
+        fetch_timeout: float,
+        session: aiohttp.ClientSession,
+    ) -> None:
+        """Initialize."""
+        self.hass = hass
+        self.key = key
+        self.url = url
+        self.fetch_timeout = fetch_timeout
+        self.refs = 0
+        self.not_modified_count = 0
+        self.unchanged_count = 0
+        self.stats = FetchStats()
+        self.archive: PayloadArchive | None = None
+        self._parse = parse
+        self._session = session
+        self._task: asyncio.Task | None = None
+        self._data: Any = None
+        self._fetched_at: float | None = None
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+        self._digest: bytes | None = None
+        self.breaker = CircuitBreaker(
+            " ".join(str(part) for part in key if part is not None),
+        )
+        self._issue_raised = False
+
+    @property
+    def issue_id(self) -> str:
+        """Return the ID of the repair issue about this endpoint."""
+        kind, arg = self.key
+        if arg is None:
+            return f"{kind}_unreachable_{DOMAIN}"
+        return f"{kind}_{arg}_unreachable_{DOMAIN}"
+
+    async def async_fetch(self, max_age: float) -> Any:
+        """Return data no older than max_age seconds, fetching if needed."""
+        if (
+            self._fetched_at is not None
+            and time.monotonic() - self._fetched_at < max_age
+        ):
+            _LOGGER.debug("Reusing shared result for %s", self.key)
+            return self._data
+
+        if self._task is None:
+            if not self.breaker.allow_request():
+                raise CircuitOpenError(
+                    "%s is failing; next attempt in %d s"
+                    % (self.url, self.breaker.retry_in)
+                )
+            # Not tracked by Home Assistant, so that startup does not
+            # wait for a slow Meteo Swiss.
+            self._task = self.hass.async_create_background_task(
+                self._async_fetch(),
+                name=f"{DOMAIN} fetch of {self.url}",
+            )
+        else:
+            _LOGGER.debug("Joining in-flight request for %s", self.key)
+        # Shielded so that one subscriber giving up does not cancel
+        # the request for the others.
+        return await asyncio.shield(self._task)
+
+    async def _async_fetch(self) -> Any:
+        timings = RequestTimings()
+        timings.mark("started")
+        try:
+            # The request runs on the event loop, so timing out
+            # cancels it outright.
+            async with timeout(self.fetch_timeout):
+                try:
+                    status, body, headers = await conditional_get(
+                        self._session,
+                        self.url,
+                        self._etag if self._data is not None else None,
+                        (
+                            self._last_modified
+                            if self._data is not None
+                            else None
+                        ),
+                        timings,
+                    )
+                except aiohttp.ClientResponseError as exc:
+                    # Error responses are recorded too, without the body
+                    # the client does not read.
+                    if self.archive is not None:
+                        self._async_record(exc.status, b"", exc.headers or {})
+                    raise
+            # Recorded before parsing, so that payloads which fail to
+            # parse can be replayed.
+            if self.archive is not None:
+                self._async_record(status, body, headers)
+            if status == 304:
+                _LOGGER.debug("%s not modified", self.key)
+                self.not_modified_count += 1
+            else:
+                self._async_process(body, headers)
+            timings.mark("parsed")
+        except Exception as exc:
+            self.stats.record_failure(exc)
+            self.breaker.record_failure(exc)
+            self._async_update_issue()
+            raise
+        else:
+            self.stats.record(timings, None if status == 304 else len(body))
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(
+                    "Fetched %s: %s",
+                    self.key,
+                    ", ".join(
+                        "%s %.1f ms" % phase
+                        for phase in timings.phases().items()
+                    ),
+                )
+            self.breaker.record_success()
+            self._async_update_issue()
+            self._fetched_at = time.monotonic()
+            return self._data
+        finally:
+            self._task = None
+
+    @callback
+    def _async_record(self, status: int, body: bytes, headers: Any) -> None:
+        response = RecordedResponse(
+            dt_util.utcnow(),
+            self.key,
+            self.url,
+            status,
+            dict(headers),
+            body,
+        )
+        # Compressing and writing block; errors are logged by write.
+        self.hass.async_add_executor_job(self.archive.write, response)
+
+    @callback
+    def _async_update_issue(self) -> None:
+        if self.breaker.exhausted and not self._issue_raised:
+            ir.async_create_issue(
+                self.hass,
+                DOMAIN,
+                self.issue_id,
+                is_fixable=False,
+                is_persistent=False,
+                severity=IssueSeverity.WARNING,
+                translation_key="endpoint_unreachable",
+                translation_placeholders={
+                    "url": self.url,
+                    "error": str(self.breaker.last_error),
+                },
+            )
+            self._issue_raised = True
+        elif not self.breaker.exhausted and self._issue_raised:
+            self.async_clear_issue()
+
+    @callback
+    def async_clear_issue(self) -> None:
+        """Withdraw the repair issue about this endpoint, if raised."""
+        if self._issue_raised:
+            ir.async_delete_issue(self.hass, DOMAIN, self.issue_id)
+            self._issue_raised = False
+
+    def diagnostics(self) -> dict[str, Any]:
+        """Return the state and statistics of the fetcher."""
+        last_error = self.breaker.last_error
+        return {
+            "url": self.url,
+            "subscribers": self.refs,
+            "not_modified": self.not_modified_count,
+            "unchanged": self.unchanged_count,
+            "breaker": {
+                "state": self.breaker.state,
+                "failures": self.breaker.failures,
+                "retry_in": self.breaker.retry_in,
+                "last_error": last_error and str(last_error),
+            },
+            **self.stats.as_dict(),
+        }
+
+    @callback
+    def _async_process(self, body: bytes, headers: Any) -> None:
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        digest = None
+        if etag is None and last_modified is None:
+            digest = hashlib.sha256(body).digest()
+            if digest == self._digest and self._data is not None:
+                _LOGGER.debug("%s unchanged", self.key)
+                self.unchanged_count += 1
+                return
+        # Parsed first: validators kept for a body that failed to parse
+        # would have the next fetch skip it, and serve stale data.
+        self._data = self._parse(body)
+        self._etag = etag
+        self._last_modified = last_modified
+        self._digest = digest
+
+
+class MeteoSwissHub:
+    """Holds one shared fetcher per post code and one for observations."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self.hass = hass
+        self._fetchers: dict[tuple[str, Any], SharedFetcher] = {}
+        self.archive: PayloadArchive | None = None
+        self._recording_entries: set[str] = set()
+        # Traced, to time the phases of each request.  It pools its
+        # connections with Home Assistant's shared session, and outlives
+        # any one entry.
+        self.session = async_create_clientsession(
+            hass,
+            auto_cleanup=False,
+            trace_configs=[trace_config()],
+        )
+        hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE,
+            self._async_detach_session,
+        )
+
+    @callback
+    def _async_detach_session(self, event: Event) -> None:
+        # The connection pool itself is closed by Home Assistant.
+        self.session.detach()
+
+    @callback
+    def async_start_recording(self, entry_id: str) -> CALLBACK_TYPE:
+        """Record every response while an entry asks to; return a stop.
+
+        Responses are shared between entries, so all of them are
+        recorded, into a single archive.
+        """
+        if self.archive is None:
+            folder = self.hass.config.path(RECORDING_FOLDER)
+            _LOGGER.info("Recording responses of Meteo Swiss in %s", folder)
+            self._async_set_archive(PayloadArchive(folder))
+        self._recording_entries.add(entry_id)
+
+        @callback
+        def stop() -> None:
+            self._recording_entries.discard(entry_id)
+            if not self._recording_entries:
+                _LOGGER.info("Stopped recording responses of Meteo Swiss")
+                self._async_set_archive(None)
+
+        return stop
+
+    @callback
+    def _async_set_archive(self, archive: PayloadArchive | None) -> None:
+        self.archive = archive
+        for fetcher in self._fetchers.values():
+            fetcher.archive = archive
+
+    @callback
+    def async_acquire_forecast(self, post_code: int) -> SharedFetcher:
+        """Subscribe to the forecast of a post code."""
+        return self._async_acquire(
+            ("forecast", post_code),
+            endpoint(FORECAST_URL.format(post_code)),
+            parse_forecast,
+            FORECAST_TIMEOUT,
+        )
+
+    @callback
+    def async_acquire_observations(self) -> SharedFetcher:
+        """Subscribe to the real-time observations of all stations.
+
+        The national file is downloaded and indexed once per cycle,
+        however many stations are being followed.
+        """
+        return self._async_acquire(
+            ("observations", None),
+            endpoint(CURRENT_CONDITION_URL),
+            ObservationTable.parse,
+            REAL_TIME_TIMEOUT,
+        )
+
+    @callback
+    def _async_acquire(
+        self,
+        key: tuple[str, Any],
+        url: str,
+        parse: Callable[[bytes], Any],
+        fetch_timeout: float,
+    ) -> SharedFetcher:
+        fetcher = self._fetchers.get(key)
+        if fetcher is None:
+            fetcher = SharedFetcher(
+                self.hass,
+                key,
+                url,
+                parse,
+                fetch_timeout,
+                self.session,
+            )
+            fetcher.archive = self.archive
+            self._fetchers[key] = fetcher
+        fetcher.refs += 1
+        _LOGGER.debug("Fetcher %s now has %s subscribers", key, fetcher.refs)
+        return fetcher
+
+    @callback
+    def async_release(self, fetcher: SharedFetcher) -> None:
+        """Unsubscribe from a fetcher, dropping it when no longer used."""
+        fetcher.refs -= 1
+        if fetcher.refs <= 0:
+            _LOGGER.debug("Dropping unused fetcher %s", fetcher.key)
+            self._fetchers.pop(fetcher.key, None)
+            fetcher.async_clear_issue()
@@ -0,0 +1,169 @@
+"""Timings and sizes of the requests, kept over the last updates."""
+import asyncio
+import bisect
+import math
+import time
+
+from collections import deque
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+
+# Phases of a request, in order.  queue is the wait for a free
+# connection of the pool, connect the TCP and TLS handshakes, server
+# the wait for the response headers once the request is sent, and
+# download the reading of the body.
+PHASES = ("queue", "dns", "connect", "server", "download", "parse")
+# Upper bounds of the histogram buckets, in milliseconds and in bytes.
+DURATION_BOUNDS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SIZE_BOUNDS = (1000, 10000, 100000, 1000000)
+# Number of values each histogram is made of.
+WINDOW = 100
+
+
+class RollingHistogram:
+    """Distribution of the last values of a quantity."""
+
+    __slots__ = ("bounds", "values")
+
+    def __init__(self, bounds: tuple[float, ...], size: int = WINDOW):
+        """Initialize."""
+        self.bounds = bounds
+        self.values: deque[float] = deque(maxlen=size)
+
+    def add(self, value: float) -> None:
+        """Add a value, forgetting the oldest one if full."""
+        self.values.append(value)
+
+    @property
+    def last(self) -> float | None:
+        """Return the latest value, if any."""
+        return self.values[-1] if self.values else None
+
+    def quantile(self, q: float) -> float | None:
+        """Return the q-quantile of the values, by the nearest rank."""
+        if not self.values:
+            return None
+        ordered = sorted(self.values)
+        rank = min(max(math.ceil(q * len(ordered)), 1), len(ordered))
+        return ordered[rank - 1]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the distribution in JSON-serializable form."""
+        counts = [0] * (len(self.bounds) + 1)
+        for value in self.values:
+            counts[bisect.bisect_left(self.bounds, value)] += 1
+        labels = ["<=%s" % bound for bound in self.bounds]
+        labels.append(">%s" % self.bounds[-1])
+        return {
+            "count": len(self.values),
+            "last": self.last,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": max(self.values, default=None),
+            "buckets": dict(zip(labels, counts)),
+        }
+
+
+class RequestTimings(SimpleNamespace):
+    """Times at which one request went through each of its phases.
+
+    Passed as the trace context of the request, so that the signals of
+    trace_config fill it in.
+    """
+
+    def mark(self, event: str) -> None:
+        """Record the time of an event of the request."""
+        setattr(self, event, time.monotonic())
+
+    def span(self, start: str, end: str) -> float:
+        """Return the milliseconds between two events, 0 if not both."""
+        try:
+            return (getattr(self, end) - getattr(self, start)) * 1000
+        except AttributeError:
+            return 0.0
+
+    def phases(self) -> dict[str, float]:
+        """Return the milliseconds spent in each phase."""
+        dns = self.span("dns_start", "dns_end")
+        return {
+            "queue": self.span("queued_start", "queued_end"),
+            "dns": dns,
+            # Name resolution happens while creating the connection.
+            "connect": max(self.span("create_start", "create_end") - dns, 0),
+            "server": self.span("headers_sent", "request_end"),
+            "download": self.span("request_end", "body_read"),
+            "parse": self.span("body_read", "parsed"),
+        }
+
+
+def trace_config() -> aiohttp.TraceConfig:
+    """Return the tracing filling in the RequestTimings of requests."""
+    config = aiohttp.TraceConfig()
+    events = (
+        (config.on_connection_queued_start, "queued_start"),
+        (config.on_connection_queued_end, "queued_end"),
+        (config.on_dns_resolvehost_start, "dns_start"),
+        (config.on_dns_resolvehost_end, "dns_end"),
+        (config.on_connection_create_start, "create_start"),
+        (config.on_connection_create_end, "create_end"),
+        (config.on_request_headers_sent, "headers_sent"),
+        (config.on_request_end, "request_end"),
+    )
+    for signal, event in events:
+        signal.append(_marker(event))
+    return config
+
+
+def _marker(event: str) -> Any:
+    async def mark(session: Any, context: Any, params: Any) -> None:
+        timings = context.trace_request_ctx
+        if isinstance(timings, RequestTimings):
+            timings.mark(event)
+
+    return mark
+
+
+class FetchStats:
+    """Rolling statistics of the requests made for one payload."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.phases = {
+            phase: RollingHistogram(DURATION_BOUNDS)
+            for phase in PHASES + ("total",)
+        }
+        self.sizes = RollingHistogram(SIZE_BOUNDS)
+        self.requests = 0
+        self.failures = 0
+        self.timeouts = 0
+
+    def record(self, timings: RequestTimings, size: int | None) -> None:
+        """Record a successful request; size is None when not modified."""
+        self.requests += 1
+        for phase, ms in timings.phases().items():
+            self.phases[phase].add(ms)
+        self.phases["total"].add(timings.span("started", "parsed"))
+        if size is not None:
+            self.sizes.add(size)
+
+    def record_failure(self, error: BaseException) -> None:
+        """Record a failed request."""
+        self.requests += 1
+        self.failures += 1
+        if isinstance(error, asyncio.TimeoutError):
+            self.timeouts += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics in JSON-serializable form."""
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "milliseconds": {
+                phase: histogram.as_dict()
+                for phase, histogram in self.phases.items()
+            },
+            "bytes": self.sizes.as_dict(),
+        }
@@ -0,0 +1,215 @@
+"""Columnar index of the national SwissMetNet observation file."""
+import csv
+import datetime
+import io
+import math
+
+from array import array
+from typing import Any
+
+STATION_COLUMN = "Station/Location"
+DATE_COLUMN = "Date"
+MISSING = "-"
+# Snapshot attribute of each SwissMetNet parameter.
+OBSERVATION_FIELDS = {
+    "tre200s0": "temperature",
+    "rre150z0": "precipitation",
+    "sre000z0": "sunshine",
+    "gre000z0": "radiation",
+    "ure200s0": "humidity",
+    "tde200s0": "dew_point",
+    "dkl010z0": "wind_direction",
+    "fu3010z0": "wind_speed",
+    "fu3010z1": "wind_gust",
+    "prestas0": "pressure",
+    "pp0qffs0": "pressure_qff",
+    "pp0qnhs0": "pressure_qnh",
+}
+
+
+class Observation:
+    """Observations of one station at one time, parsed once.
+
+    Each SwissMetNet parameter is a float attribute named after
+    OBSERVATION_FIELDS, None when the station did not report it.  The
+    names of those attributes are also listed in missing.
+    """
+
+    __slots__ = ("station", "time", "missing") + tuple(
+        OBSERVATION_FIELDS.values()
+    )
+
+    def __init__(
+        self,
+        station: str,
+        time: datetime.datetime | None,
+        **values: float | None,
+    ) -> None:
+        """Initialize."""
+        self.station = station
+        self.time = time
+        missing = []
+        for field in OBSERVATION_FIELDS.values():
+            value = values.get(field)
+            setattr(self, field, value)
+            if value is None:
+                missing.append(field)
+        self.missing: tuple[str, ...] = tuple(missing)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Observation":
+        """Return a snapshot out of what as_dict returned."""
+        time = data.get("time")
+        return cls(
+            data["station"],
+            datetime.datetime.fromisoformat(time) if time else None,
+            **{
+                field: data.get(field)
+                for field in OBSERVATION_FIELDS.values()
+            },
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the snapshot in JSON-serializable form."""
+        data: dict[str, Any] = {
+            "station": self.station,
+            "time": self.time.isoformat() if self.time else None,
+        }
+        for field in OBSERVATION_FIELDS.values():
+            data[field] = getattr(self, field)
+        return data
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether two snapshots hold the same observations."""
+        if not isinstance(other, Observation):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name)
+            for name in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        """Return a debugging representation."""
+        values = ", ".join(
+            "%s=%s" % (field, getattr(self, field))
+            for field in OBSERVATION_FIELDS.values()
+        )
+        return "<Observation %s at %s: %s>" % (self.station, self.time, values)
+
+
+def parse_date(date: int) -> datetime.datetime | None:
+    """Return the UTC time of a yyyymmddHHMM measurement date."""
+    try:
+        return datetime.datetime.strptime(str(date), "%Y%m%d%H%M").replace(
+            tzinfo=datetime.timezone.utc
+        )
+    except ValueError:
+        return None
+
+
+class ObservationTable:
+    """All stations' current observations, one float array per column.
+
+    Missing values are stored as NaN.  Rows are looked up by station code
+    in constant time.
+    """
+
+    __slots__ = ("columns", "stations", "dates", "values", "_rows")
+
+    def __init__(
+        self,
+        columns: list[str],
+        stations: list[str],
+        dates: array,
+        values: dict[str, array],
+    ) -> None:
+        """Initialize."""
+        self.columns = columns
+        self.stations = stations
+        self.dates = dates
+        self.values = values
+        self._rows = {station: i for i, station in enumerate(stations)}
+
+    @classmethod
+    def parse(cls, body: bytes) -> "ObservationTable":
+        """Parse the semicolon-separated national file."""
+        reader = csv.reader(
+            io.StringIO(body.decode("utf-8", errors="replace")),
+            delimiter=";",
+        )
+        header = next(reader)
+        station_col = header.index(STATION_COLUMN)
+        date_col = header.index(DATE_COLUMN)
+        value_cols = [
+            (i, name)
+            for i, name in enumerate(header)
+            if i not in (station_col, date_col)
+        ]
+        stations: list[str] = []
+        dates = array("q")
+        values = {name: array("d") for _, name in value_cols}
+        nan = math.nan
+        for line in reader:
+            if len(line) != len(header):
+                continue
+            stations.append(line[station_col])
+            try:
+                dates.append(int(line[date_col]))
+            except ValueError:
+                dates.append(0)
+            for i, name in value_cols:
+                field = line[i]
+                if field == MISSING or not field:
+                    values[name].append(nan)
+                    continue
+                try:
+                    values[name].append(float(field))
+                except ValueError:
+                    values[name].append(nan)
+        return cls([name for _, name in value_cols], stations, dates, values)
+
+    def __len__(self) -> int:
+        """Return the number of stations."""
+        return len(self.stations)
+
+    def __contains__(self, station: str) -> bool:
+        """Return whether a station has observations."""
+        return station in self._rows
+
+    def row(self, station: str) -> int | None:
+        """Return the row index of a station."""
+        return self._rows.get(station)
+
+    def value(self, station: str, column: str) -> float | None:
+        """Return one observation of a station, or None if missing."""
+        i = self._rows.get(station)
+        if i is None or column not in self.values:
+            return None
+        v = self.values[column][i]
+        return None if math.isnan(v) else v
+
+    def observation(self, station: str) -> Observation | None:
+        """Return a snapshot of the observations of a station."""
+        i = self._rows.get(station)
+        if i is None:
+            return None
+        values = {}
+        for name, field in OBSERVATION_FIELDS.items():
+            column = self.values.get(name)
+            if column is not None and not math.isnan(column[i]):
+                values[field] = column[i]
+        return Observation(station, parse_date(self.dates[i]), **values)
+
+    def record(self, station: str) -> dict[str, str | float | None] | None:
+        """Return all observations of a station keyed by column."""
+        i = self._rows.get(station)
+        if i is None:
+            return None
+        record: dict[str, str | float | None] = {
+            STATION_COLUMN: station,
+            DATE_COLUMN: str(self.dates[i]),
+        }
+        for name, column in self.values.items():
+            v = column[i]
+            record[name] = None if math.isnan(v) else v
+        return record
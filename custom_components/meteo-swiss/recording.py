@@ -0,0 +1,141 @@
+"""Archive of the raw responses of Meteo Swiss, for replaying them."""
+import datetime
+import gzip
+import json
+import logging
+import pathlib
+import threading
+import zlib
+
+from dataclasses import dataclass
+from typing import Any, Iterator, Mapping
+
+_LOGGER = logging.getLogger(__name__)
+
+# Folder of the archive, in the configuration folder.
+RECORDING_FOLDER = "meteo-swiss-recordings"
+# Compressed bytes per file, and in the whole archive; the oldest files
+# are deleted to stay under the latter.
+SEGMENT_SIZE = 5 * 2**20
+ARCHIVE_SIZE = 50 * 2**20
+SUFFIX = ".jsonl.gz"
+
+
+@dataclass(frozen=True)
+class RecordedResponse:
+    """A response of Meteo Swiss, as it was received."""
+
+    time: datetime.datetime
+    # Key of the shared fetcher which received it
+    key: tuple[str, Any]
+    url: str
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the response in JSON-serializable form."""
+        return {
+            "time": self.time.isoformat(),
+            "key": list(self.key),
+            "url": self.url,
+            "status": self.status,
+            "headers": dict(self.headers),
+            # Latin-1 maps every byte to one character and back, so any
+            # body survives, and text stays readable in the archive.
+            "body": self.body.decode("latin-1"),
+        }
+
+    @classmethod
+    def from_dict(cls, dumped: dict[str, Any]) -> "RecordedResponse":
+        """Return the response out of what as_dict returned."""
+        return cls(
+            datetime.datetime.fromisoformat(dumped["time"]),
+            tuple(dumped["key"]),
+            dumped["url"],
+            dumped["status"],
+            dumped["headers"],
+            dumped["body"].encode("latin-1"),
+        )
+
+
+class PayloadArchive:
+    """Size-capped archive of responses, in rotating gzip files.
+
+    Files hold one response per line, as JSON, and are named after the
+    time of their first response.  Each line is compressed on its own,
+    so that a file cut short loses no more than its last response.
+
+    Writing blocks, so it is meant to run in the executor.
+    """
+
+    def __init__(
+        self,
+        folder: str | pathlib.Path,
+        segment_size: int = SEGMENT_SIZE,
+        archive_size: int = ARCHIVE_SIZE,
+    ) -> None:
+        """Initialize."""
+        self.folder = pathlib.Path(folder)
+        self.segment_size = segment_size
+        self.archive_size = archive_size
+        self._segment: pathlib.Path | None = None
+        # Responses to several fetchers may be written at the same time.
+        self._lock = threading.Lock()
+
+    def write(self, response: RecordedResponse) -> None:
+        """Append a response to the archive, rotating files as needed."""
+        line = json.dumps(response.as_dict(), separators=(",", ":"))
+        try:
+            with self._lock:
+                segment = self._current_segment(response.time)
+                with gzip.open(segment, "ab") as f:
+                    f.write(line.encode() + b"\n")
+        except OSError as exc:
+            _LOGGER.warning(
+                "Could not record the response to %s: %s",
+                response.url,
+                exc,
+            )
+
+    def _current_segment(self, time: datetime.datetime) -> pathlib.Path:
+        segment = self._segment
+        if (
+            segment is not None
+            and segment.exists()
+            and segment.stat().st_size < self.segment_size
+        ):
+            return segment
+        self.folder.mkdir(parents=True, exist_ok=True)
+        segment = self.folder / (
+            time.strftime("%Y%m%dT%H%M%S%f") + SUFFIX
+        )
+        # Room for the new file, which is not there yet.
+        older = segments(self.folder)
+        total = sum(path.stat().st_size for path in older)
+        while older and total + self.segment_size > self.archive_size:
+            oldest = older.pop(0)
+            total -= oldest.stat().st_size
+            _LOGGER.debug("Deleting old recording %s", oldest)
+            oldest.unlink()
+        self._segment = segment
+        return segment
+
+
+def segments(folder: str | pathlib.Path) -> list[pathlib.Path]:
+    """Return the files of an archive, oldest first."""
+    return sorted(pathlib.Path(folder).glob("*" + SUFFIX))
+
+
+def read_archive(folder: str | pathlib.Path) -> Iterator[RecordedResponse]:
+    """Yield the responses of an archive, oldest first.
+
+    The unreadable end of a file cut short is skipped.
+    """
+    for segment in segments(folder):
+        try:
+            with gzip.open(segment, "rb") as f:
+                for line in f:
+                    yield RecordedResponse.from_dict(json.loads(line))
+        except (EOFError, OSError, zlib.error, ValueError) as exc:
+            _LOGGER.warning("Skipping the rest of %s: %s", segment, exc)
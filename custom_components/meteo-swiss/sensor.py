@@ -1,36 +1,285 @@
 import logging
-import pprint
 
+from collections.abc import Callable
+from dataclasses import dataclass
 
 from homeassistant.components.sensor import (
+    SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
 )
 
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    DEGREE,
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfIrradiance,
+    UnitOfLength,
+    UnitOfPressure,
+    UnitOfSpeed,
+    UnitOfTemperature,
+    UnitOfTime,
+)
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from . import MeteoSwissDataUpdateCoordinator
-
-from homeassistant.const import STATE_UNAVAILABLE
+from . import (
+    MeteoSwissDataUpdateCoordinator,
+    MeteoSwissEntryData,
+    MeteoSwissRealTimeCoordinator,
+)
 
 from .const import (
-    CONF_POSTCODE,
-    CONF_REAL_TIME_NAME,
-    CONF_STATION,
+    ATTR_OBSERVATION_TIME,
+    ATTR_STALE,
     DOMAIN,
-    SENSOR_TYPES,
-    SENSOR_TYPE_CLASS,
-    SENSOR_TYPE_ICON,
-    SENSOR_TYPE_NAME,
-    SENSOR_TYPE_UNIT,
-    SENSOR_DATA_ID,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True, kw_only=True)
+class MeteoSwissSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor of one observation of a station."""
+
+    # Attribute of the Observation shown by the sensor
+    field: str
+
+
+@dataclass(frozen=True, kw_only=True)
+class MeteoSwissDerivedSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor of an aggregate of the recent observations."""
+
+    # Name of the ObservationHistory aggregate shown by the sensor
+    aggregate: str
+
+
+@dataclass(frozen=True, kw_only=True)
+class MeteoSwissDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor of how the updates of a coordinator go."""
+
+    value_fn: Callable[[MeteoSwissDataUpdateCoordinator], float | None]
+
+
+SENSOR_TYPES: tuple[MeteoSwissSensorEntityDescription, ...] = (
+    MeteoSwissSensorEntityDescription(
+        key="temperature",
+        name="temperature",
+        field="temperature",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        icon="mdi:thermometer",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    MeteoSwissSensorEntityDescription(
+        key="10minrain",
+        name="10 minute rain",
+        field="precipitation",
+        native_unit_of_measurement=UnitOfLength.MILLIMETERS,
+        icon="mdi:water",
+        device_class=SensorDeviceClass.PRECIPITATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    MeteoSwissSensorEntityDescription(
+        key="10minsun",
+        name="10 minute sun",
+        field="sunshine",
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        icon="mdi:weather-sunny",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+    ),
+    MeteoSwissSensorEntityDescription(
+        key="sun_radiant",
+        name="sun irradiation",
+        field="radiation",
+        native_unit_of_measurement=UnitOfIrradiance.WATTS_PER_SQUARE_METER,
+        icon="mdi:weather-sunny",
+        device_class=SensorDeviceClass.IRRADIANCE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+    ),
+    MeteoSwissSensorEntityDescription(
+        key="humidity",
+        name="humidity",
+        field="humidity",
+        native_unit_of_measurement=PERCENTAGE,
+        icon="mdi:water-percent",
+        device_class=SensorDeviceClass.HUMIDITY,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    MeteoSwissSensorEntityDescription(
+        key="dew_point",
+        name="dew point",
+        field="dew_point",
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        icon="mdi:weather-fog",
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    MeteoSwissSensorEntityDescription(
+        key="wind_direction",
+        name="wind direction",
+        field="wind_direction",
+        native_unit_of_measurement=DEGREE,
+        icon="mdi:compass-rose",
+        # The mean of angles is meaningless, so no statistics.
+        suggested_display_precision=0,
+    ),
+    MeteoSwissSensorEntityDescription(
+        key="wind_speed",
+        name="wind speed",
+        field="wind_speed",
+        native_unit_of_measurement=UnitOfSpeed.KILOMETERS_PER_HOUR,
+        icon="mdi:weather-windy",
+        device_class=SensorDeviceClass.WIND_SPEED,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    MeteoSwissSensorEntityDescription(
+        key="wind_speed_max",
+        name="wind speed max",
+        field="wind_gust",
+        native_unit_of_measurement=UnitOfSpeed.KILOMETERS_PER_HOUR,
+        icon="mdi:weather-windy",
+        device_class=SensorDeviceClass.WIND_SPEED,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    MeteoSwissSensorEntityDescription(
+        key="pressure",
+        name="pressure",
+        field="pressure",
+        native_unit_of_measurement=UnitOfPressure.HPA,
+        icon="mdi:gauge",
+        device_class=SensorDeviceClass.ATMOSPHERIC_PRESSURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    MeteoSwissSensorEntityDescription(
+        key="pressure_qff",
+        name="pressure QFF",
+        field="pressure_qff",
+        native_unit_of_measurement=UnitOfPressure.HPA,
+        icon="mdi:gauge",
+        device_class=SensorDeviceClass.ATMOSPHERIC_PRESSURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    MeteoSwissSensorEntityDescription(
+        key="pressure_qnh",
+        name="pressure QNH",
+        field="pressure_qnh",
+        native_unit_of_measurement=UnitOfPressure.HPA,
+        icon="mdi:gauge",
+        device_class=SensorDeviceClass.ATMOSPHERIC_PRESSURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+)
+
+DERIVED_SENSOR_TYPES: tuple[MeteoSwissDerivedSensorEntityDescription, ...] = (
+    MeteoSwissDerivedSensorEntityDescription(
+        key="1hrain",
+        name="1 hour rain",
+        aggregate="precipitation_1h",
+        native_unit_of_measurement=UnitOfLength.MILLIMETERS,
+        icon="mdi:water",
+        device_class=SensorDeviceClass.PRECIPITATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    MeteoSwissDerivedSensorEntityDescription(
+        key="24hrain",
+        name="24 hour rain",
+        aggregate="precipitation_24h",
+        native_unit_of_measurement=UnitOfLength.MILLIMETERS,
+        icon="mdi:water",
+        device_class=SensorDeviceClass.PRECIPITATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    MeteoSwissDerivedSensorEntityDescription(
+        key="sun_today",
+        name="sun today",
+        aggregate="sunshine_today",
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        icon="mdi:weather-sunny",
+        device_class=SensorDeviceClass.DURATION,
+        # Starts over every day.
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=0,
+    ),
+    MeteoSwissDerivedSensorEntityDescription(
+        key="pressure_tendency",
+        name="3 hour pressure tendency",
+        aggregate="pressure_tendency_3h",
+        native_unit_of_measurement=UnitOfPressure.HPA,
+        icon="mdi:gauge",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+    MeteoSwissDerivedSensorEntityDescription(
+        key="wind_speed_max_today",
+        name="wind speed max today",
+        aggregate="wind_gust_max_today",
+        native_unit_of_measurement=UnitOfSpeed.KILOMETERS_PER_HOUR,
+        icon="mdi:weather-windy",
+        device_class=SensorDeviceClass.WIND_SPEED,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    ),
+)
+
+DIAGNOSTIC_SENSOR_TYPES: tuple[
+    MeteoSwissDiagnosticSensorEntityDescription, ...
+] = (
+    MeteoSwissDiagnosticSensorEntityDescription(
+        key="update_time",
+        name="update time",
+        value_fn=lambda coordinator: coordinator.update_times.last,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+    MeteoSwissDiagnosticSensorEntityDescription(
+        key="fetch_failures",
+        name="fetch failures",
+        value_fn=lambda coordinator: coordinator.fetcher.stats.failures,
+        icon="mdi:alert-circle-outline",
+        # Starts over when Home Assistant restarts.
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+    MeteoSwissDiagnosticSensorEntityDescription(
+        key="payload_size",
+        name="payload size",
+        value_fn=lambda coordinator: coordinator.fetcher.stats.sizes.last,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        icon="mdi:download",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+    ),
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -38,12 +287,39 @@ async def async_setup_entry(
 ):
     """Set up all sensors."""
     _LOGGER.debug("Starting async setup platform for sensor")
-    c: MeteoSwissDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    d: MeteoSwissEntryData = hass.data[DOMAIN][entry.entry_id]
+    c = d.real_time
 
-    if c.station:
+    async_add_entities(
+        MeteoSwissDiagnosticSensor(
+            entry.entry_id,
+            description,
+            d.forecast,
+            "forecast",
+            d.forecast.forecast_name,
+        )
+        for description in DIAGNOSTIC_SENSOR_TYPES
+    )
+    if c:
         async_add_entities(
-            [MeteoSwissSensor(entry.entry_id, typ, c) for typ in SENSOR_TYPES],
-            True,
+            [
+                MeteoSwissSensor(entry.entry_id, description, c)
+                for description in SENSOR_TYPES
+            ]
+            + [
+                MeteoSwissDerivedSensor(entry.entry_id, description, c)
+                for description in DERIVED_SENSOR_TYPES
+            ]
+            + [
+                MeteoSwissDiagnosticSensor(
+                    entry.entry_id,
+                    description,
+                    c,
+                    "real_time",
+                    c.real_time_name,
+                )
+                for description in DIAGNOSTIC_SENSOR_TYPES
+            ],
         )
     else:
         _LOGGER.debug(
@@ -53,62 +329,127 @@ async def async_setup_entry(
 
 
 class MeteoSwissSensor(
-    CoordinatorEntity[MeteoSwissDataUpdateCoordinator],
+    CoordinatorEntity[MeteoSwissRealTimeCoordinator],
     SensorEntity,
 ):
     """Represents a sensor from Meteo Swiss."""
 
+    # Changes with every observation; the recorder need not keep it.
+    _unrecorded_attributes = frozenset({ATTR_OBSERVATION_TIME})
+
+    entity_description: MeteoSwissSensorEntityDescription
+
     def __init__(
         self,
         integration_id: str,
-        sensor_type,
-        coordinator: MeteoSwissDataUpdateCoordinator,
+        description: SensorEntityDescription,
+        coordinator: MeteoSwissRealTimeCoordinator,
     ):
         super().__init__(coordinator)
-        self._attr_unique_id = "sensor.%s-%s" % (integration_id, sensor_type)
-        self._state = None
-        self._type = sensor_type
+        self.entity_description = description
+        self._attr_unique_id = "sensor.%s-%s" % (
+            integration_id,
+            description.key,
+        )
         self._data = coordinator.data
-        self._attr_station = coordinator.data[CONF_STATION]
-        self._attr_post_code = coordinator.data[CONF_POSTCODE]
+        self._attr_station = coordinator.station
+        self._attr_post_code = coordinator.post_code
+        self._real_time_name = coordinator.real_time_name
 
     @property
     def name(self):
         """Return the name of the sensor."""
-        x = SENSOR_TYPES[self._type][SENSOR_TYPE_NAME]
-        return f"{self._data[CONF_REAL_TIME_NAME]} {x}"
+        x = self.entity_description.name
+        return f"{self._real_time_name} {x}"
 
     @property
-    def state(self):
-        dataId = SENSOR_TYPES[self._type][SENSOR_DATA_ID]
-        if "condition" not in self._data or not self._data["condition"]:
-            return STATE_UNAVAILABLE
-        try:
-            return self._data["condition"][0][dataId]
-        except Exception:
-            _LOGGER.warning(
-                "Real-time weather station returned bad data:\n%s",
-                pprint.pformat(self._data),
-            )
-            return STATE_UNAVAILABLE
+    def native_value(self) -> float | None:
+        """Return the observed value."""
+        if not self._data:
+            return None
+        return getattr(self._data, self.entity_description.field)
 
     @property
-    def unit_of_measurement(self):
-        """Return the unit of measurement."""
-        return SENSOR_TYPES[self._type][SENSOR_TYPE_UNIT]
+    def available(self) -> bool:
+        """Return whether the last good observations are recent enough."""
+        return self.coordinator.data_available
 
     @property
-    def icon(self):
-        """Return the icon."""
-        return SENSOR_TYPES[self._type][SENSOR_TYPE_ICON]
-
-    @property
-    def device_class(self):
-        """Return the device class of the sensor."""
-        return SENSOR_TYPES[self._type][SENSOR_TYPE_CLASS]
+    def extra_state_attributes(self):
+        """Return when the observation was made."""
+        if not self._data:
+            return None
+        return {
+            ATTR_OBSERVATION_TIME: self._data.time,
+            ATTR_STALE: self.coordinator.stale,
+        }
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle data update."""
         self._data = self.coordinator.data
         self.async_write_ha_state()
+
+
+class MeteoSwissDerivedSensor(MeteoSwissSensor):
+    """Represents an aggregate of the recent observations of a station."""
+
+    entity_description: MeteoSwissDerivedSensorEntityDescription
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the aggregate."""
+        if not self._data:
+            return None
+        return self.coordinator.history.aggregate(
+            self.entity_description.aggregate,
+        )
+
+
+class MeteoSwissDiagnosticSensor(
+    CoordinatorEntity[MeteoSwissDataUpdateCoordinator],
+    SensorEntity,
+):
+    """Represents how the updates of a coordinator go."""
+
+    entity_description: MeteoSwissDiagnosticSensorEntityDescription
+
+    def __init__(
+        self,
+        integration_id: str,
+        description: MeteoSwissDiagnosticSensorEntityDescription,
+        coordinator: MeteoSwissDataUpdateCoordinator,
+        kind: str,
+        name: str | None,
+    ):
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = "sensor.%s-%s_%s" % (
+            integration_id,
+            kind,
+            description.key,
+        )
+        self._attr_name = f"{name} {description.name}"
+
+    async def async_added_to_hass(self) -> None:
+        """Also write the state after each update attempt."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_attempt_listener(
+                self.async_write_ha_state
+            )
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Do nothing: the state is written after each attempt already."""
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the measure of the updates."""
+        return self.entity_description.value_fn(self.coordinator)
+
+    @property
+    def available(self) -> bool:
+        """Return True, failed updates being what it may report."""
+        return True
@@ -0,0 +1,68 @@
+"""Last known good data of each entry, kept across restarts."""
+import logging
+
+from typing import Any, Callable
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Updates are coalesced into at most one write per this many seconds;
+# pending writes are flushed when the entry is unloaded, or Home
+# Assistant stops.
+SAVE_DELAY = 60
+
+
+class EntrySnapshot:
+    """Persists the latest data of the coordinators of an entry.
+
+    One instance is kept per entry, across reloads, so that a write it
+    delayed cannot recreate the file once deleted by another.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize."""
+        self._store: Store = Store(
+            hass,
+            STORAGE_VERSION,
+            f"{DOMAIN}.{entry_id}",
+        )
+        self._dumps: dict[str, Callable[[], Any]] = {}
+        self._pending = False
+
+    async def async_load(self) -> dict[str, Any]:
+        """Return the data saved by a previous run, if any."""
+        try:
+            return await self._store.async_load() or {}
+        except Exception:
+            _LOGGER.warning("Could not load saved data", exc_info=True)
+            return {}
+
+    @callback
+    def async_register(self, key: str, dump: Callable[[], Any]) -> None:
+        """Save what dump returns under key on each save."""
+        self._dumps[key] = dump
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save soon."""
+        self._pending = True
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Save now if a save is pending."""
+        if self._pending:
+            self._pending = False
+            await self._store.async_save(self._data_to_save())
+
+    def _data_to_save(self) -> dict[str, Any]:
+        self._pending = False
+        return {key: dump() for key, dump in self._dumps.items()}
+
+    async def async_remove(self) -> None:
+        """Delete the saved data, and cancel any pending save."""
+        self._pending = False
+        await self._store.async_remove()
@@ -0,0 +1,179 @@
+"""Persistent cache of the SwissMetNet station list."""
+import asyncio
+import csv
+import io
+import logging
+import time
+
+from async_timeout import timeout
+from typing import Any
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
+
+from .client import conditional_get, endpoint
+from .const import DATA_STATIONS, DOMAIN
+from .geo import PointIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+STATION_URL = (
+    "https://data.geo.admin.ch/ch.meteoschweiz.messnetz-automatisch/"
+    "ch.meteoschweiz.messnetz-automatisch_fr.csv"
+)
+STATION_TYPE_PRECIPITATION = "precipitation"
+STATION_TYPE_WEATHER = "weather"
+STATION_TYPES = {
+    "Précipitation": STATION_TYPE_PRECIPITATION,
+    "Station météo": STATION_TYPE_WEATHER,
+}
+STORAGE_KEY = f"{DOMAIN}.stations"
+STORAGE_VERSION = 1
+# The station list changes a few times a year at most; past this age it
+# is still served, but revalidated in the background.
+STATION_CACHE_TTL = 24 * 60 * 60
+FETCH_TIMEOUT = 30
+
+
+def parse_stations(body: bytes) -> dict[str, dict[str, Any]]:
+    """Parse the station list, keyed by station code."""
+    reader = csv.DictReader(
+        io.StringIO(body.decode("latin-1")),
+        delimiter=";",
+    )
+    stations = {}
+    for line in reader:
+        try:
+            code = line["Abr."].strip()
+            station = {
+                "code": code,
+                "name": line["Station"].strip(),
+                "lat": float(line["Latitude"]),
+                "lon": float(line["Longitude"]),
+                "altitude": float(line["Altitude station m s. mer"]),
+                "type": STATION_TYPES[line["Type de station"]],
+            }
+        except (AttributeError, KeyError, TypeError, ValueError):
+            # Footer notes and stations of other types.
+            continue
+        stations[code] = station
+    return stations
+
+
+def build_index(stations: dict[str, dict[str, Any]]) -> PointIndex[str]:
+    """Return a nearest-station index over a station list."""
+    return PointIndex(
+        (code, station["lat"], station["lon"])
+        for code, station in stations.items()
+    )
+
+
+class StationCache:
+    """Station list persisted on disk, revalidated in the background."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self.hass = hass
+        self._store: Store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._stations: dict[str, dict[str, Any]] | None = None
+        self._fetched_at: float = 0
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+        self._refresh: asyncio.Task | None = None
+        self._indexes: dict[str | None, PointIndex[str]] = {}
+
+    async def async_get(
+        self,
+        station_type: str | None = None,
+    ) -> dict[str, dict[str, Any]]:
+        """Return the stations, of one type if given."""
+        if self._stations is None:
+            await self._async_load()
+        if self._stations is None:
+            await self._async_start_refresh()
+        elif time.time() - self._fetched_at > STATION_CACHE_TTL:
+            self._async_start_refresh()
+
+        if station_type is None:
+            return self._stations
+        return {
+            code: station
+            for code, station in self._stations.items()
+            if station["type"] == station_type
+        }
+
+    async def async_get_index(
+        self,
+        station_type: str | None = None,
+    ) -> PointIndex[str]:
+        """Return a nearest-station index, of one type if given.
+
+        The index is built once per station list and type.
+        """
+        stations = await self.async_get(station_type)
+        if station_type not in self._indexes:
+            self._indexes[station_type] = build_index(stations)
+        return self._indexes[station_type]
+
+    async def _async_load(self) -> None:
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        self._stations = stored["stations"]
+        self._fetched_at = stored["fetched_at"]
+        self._etag = stored.get("etag")
+        self._last_modified = stored.get("last_modified")
+        self._indexes = {}
+        _LOGGER.debug("Loaded %s stations from disk", len(self._stations))
+
+    @callback
+    def _async_start_refresh(self) -> asyncio.Task:
+        if self._refresh is None:
+            self._refresh = self.hass.async_create_background_task(
+                self._async_refresh(),
+                f"{DOMAIN} station list refresh",
+            )
+        return self._refresh
+
+    async def _async_refresh(self) -> None:
+        try:
+            async with timeout(FETCH_TIMEOUT):
+                status, body, headers = await conditional_get(
+                    async_get_clientsession(self.hass),
+                    endpoint(STATION_URL),
+                    self._etag if self._stations else None,
+                    self._last_modified if self._stations else None,
+                )
+            if status != 304:
+                self._stations = parse_stations(body)
+                self._indexes = {}
+                self._etag = headers.get("ETag")
+                self._last_modified = headers.get("Last-Modified")
+                _LOGGER.debug("Fetched %s stations", len(self._stations))
+            self._fetched_at = time.time()
+            await self._store.async_save(
+                {
+                    "stations": self._stations,
+                    "fetched_at": self._fetched_at,
+                    "etag": self._etag,
+                    "last_modified": self._last_modified,
+                }
+            )
+        except Exception:
+            if self._stations is None:
+                raise
+            _LOGGER.warning(
+                "Could not revalidate the station list; keeping cached one",
+                exc_info=True,
+            )
+        finally:
+            self._refresh = None
+
+
+@callback
+def async_get_station_cache(hass: HomeAssistant) -> StationCache:
+    """Return the process-wide station cache."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_STATIONS not in domain_data:
+        domain_data[DATA_STATIONS] = StationCache(hass)
+    return domain_data[DATA_STATIONS]
@@ -0,0 +1,154 @@
+"""Observations interpolated at a point from the nearest stations."""
+import math
+
+from typing import Any
+
+from .geo import PointIndex
+from .observations import (
+    OBSERVATION_FIELDS,
+    Observation,
+    ObservationTable,
+    parse_date,
+)
+
+# Weights are the inverse of the distance to this power.
+POWER = 2
+# Stations closer than this many km weigh as if this far, so that one
+# right at the point does not take all the weight.
+MIN_DISTANCE = 0.5
+# Degrees Celsius lost per metre climbed, in the standard atmosphere and
+# for the dew point.
+LAPSE_RATE = 0.0065
+DEW_POINT_LAPSE_RATE = 0.002
+# Metres over which the pressure at the station drops by a factor e.
+SCALE_HEIGHT = 8400
+WIND_DIRECTION = "wind_direction"
+
+
+class VirtualStation:
+    """Observations at a point, interpolated from the nearest stations.
+
+    Each field is the mean of the stations reporting it, weighted by
+    the inverse of their distance to the point.  Temperatures and the
+    pressure at the station are first brought to the altitude of the
+    point; wind directions are averaged as vectors.  Stations missing
+    from a national file, or not reporting a field, are left out, and
+    the weights of the others normalized again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        altitude: float,
+        neighbours: list[tuple[str, float, float]],
+    ) -> None:
+        """Interpolate from (code, distance in km, altitude) triples."""
+        self.name = name
+        self.altitude = altitude
+        self.neighbours = neighbours
+        self._weights = [
+            1 / max(distance, MIN_DISTANCE) ** POWER
+            for _, distance, _ in neighbours
+        ]
+        # Each field of each station is brought to the altitude of the
+        # point as value * scale + offset.
+        climbs = [altitude - alt for _, _, alt in neighbours]
+        self._corrections: dict[str, list[tuple[float, float]]] = {
+            "temperature": [(1.0, -LAPSE_RATE * dz) for dz in climbs],
+            "dew_point": [(1.0, -DEW_POINT_LAPSE_RATE * dz) for dz in climbs],
+            "pressure": [(math.exp(-dz / SCALE_HEIGHT), 0.0) for dz in climbs],
+        }
+        self._no_correction = [(1.0, 0.0)] * len(neighbours)
+
+    @classmethod
+    def nearest(
+        cls,
+        name: str,
+        lat: float,
+        lon: float,
+        altitude: float,
+        k: int,
+        stations: dict[str, dict[str, Any]],
+        index: PointIndex[str],
+    ) -> "VirtualStation | None":
+        """Return the point interpolated from its k nearest stations.
+
+        None if there are no stations to interpolate from.
+        """
+        neighbours = [
+            (code, distance, stations[code]["altitude"])
+            for distance, code in index.nearest(lat, lon, k)
+        ]
+        if not neighbours:
+            return None
+        return cls(name, altitude, neighbours)
+
+    @property
+    def stations(self) -> list[str]:
+        """Return the codes of the stations interpolated from."""
+        return [code for code, _, _ in self.neighbours]
+
+    def interpolate(self, table: ObservationTable) -> Observation | None:
+        """Return the observations at the point, None if no station has."""
+        present = [
+            (n, i)
+            for n, i in enumerate(table.row(code) for code in self.stations)
+            if i is not None
+        ]
+        if not present:
+            return None
+        values = {}
+        for name, field in OBSERVATION_FIELDS.items():
+            column = table.values.get(name)
+            if column is None:
+                continue
+            if field == WIND_DIRECTION:
+                value = self._mean_direction(column, present)
+            else:
+                value = self._mean(
+                    column,
+                    present,
+                    self._corrections.get(field, self._no_correction),
+                )
+            if value is not None:
+                values[field] = value
+        date = max(table.dates[i] for _, i in present)
+        return Observation(self.name, parse_date(date), **values)
+
+    def _mean(
+        self,
+        column: Any,
+        present: list[tuple[int, int]],
+        corrections: list[tuple[float, float]],
+    ) -> float | None:
+        weights = self._weights
+        total = 0.0
+        weight = 0.0
+        for n, i in present:
+            v = column[i]
+            if v != v:
+                # NaN: not reported.
+                continue
+            scale, offset = corrections[n]
+            total += weights[n] * (v * scale + offset)
+            weight += weights[n]
+        return total / weight if weight else None
+
+    def _mean_direction(
+        self,
+        column: Any,
+        present: list[tuple[int, int]],
+    ) -> float | None:
+        weights = self._weights
+        x = 0.0
+        y = 0.0
+        for n, i in present:
+            v = column[i]
+            if v != v:
+                continue
+            angle = math.radians(v)
+            x += weights[n] * math.cos(angle)
+            y += weights[n] * math.sin(angle)
+        if not x and not y:
+            return None
+        return math.degrees(math.atan2(y, x)) % 360
@@ -1,7 +1,6 @@
-import datetime
 import logging
 
-from typing import Any
+from collections import Counter
 
 from homeassistant.components.weather import (
     ATTR_FORECAST_CONDITION,
@@ -9,22 +8,34 @@ from homeassistant.components.weather import (
     ATTR_FORECAST_NATIVE_TEMP_LOW,
     ATTR_FORECAST_TIME,
     ATTR_FORECAST_NATIVE_PRECIPITATION,
+    ATTR_FORECAST_NATIVE_WIND_SPEED,
+    ATTR_FORECAST_WIND_BEARING,
+    ATTR_WEATHER_HUMIDITY,
+    ATTR_WEATHER_PRESSURE,
+    ATTR_WEATHER_TEMPERATURE,
+    ATTR_WEATHER_WIND_BEARING,
+    ATTR_WEATHER_WIND_SPEED,
+    Forecast,
     WeatherEntity,
+    WeatherEntityFeature,
 )
 from homeassistant.const import (
-    TEMP_CELSIUS,
-    SPEED_KILOMETERS_PER_HOUR,
-    PRESSURE_HPA,
+    UnitOfPressure,
+    UnitOfSpeed,
+    UnitOfTemperature,
 )
 
 
 from .const import (
-    CONF_FORECAST_NAME,
-    CONF_POSTCODE,
-    CONF_STATION,
-    CONDITION_CLASSES,
+    ATTR_FORECAST_FETCHED,
+    ATTR_OBSERVATION_TIME,
+    ATTR_STALE,
+    CONDITION_UNKNOWN,
     DOMAIN,
+    ICON_CONDITIONS,
 )
+from .forecast import NO_ICON, ForecastSeries
+from .observations import Observation
 
 
 from homeassistant.config_entries import ConfigEntry
@@ -32,10 +43,70 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from . import MeteoSwissDataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+from . import (
+    MeteoSwissEntryData,
+    MeteoSwissForecastCoordinator,
+    MeteoSwissRealTimeCoordinator,
+)
 
 
 _LOGGER = logging.getLogger(__name__)
+# How many times each unknown icon ID was seen.
+UNKNOWN_ICONS: Counter = Counter()
+
+
+def icon_condition(icon) -> str | None:
+    """Return the condition of a Meteo Swiss icon ID."""
+    try:
+        i = int(icon)
+    except (TypeError, ValueError):
+        i = -1
+    if 0 <= i < len(ICON_CONDITIONS):
+        condition = ICON_CONDITIONS[i]
+    else:
+        condition = CONDITION_UNKNOWN
+    if condition is CONDITION_UNKNOWN:
+        if icon not in UNKNOWN_ICONS:
+            _LOGGER.warning("Unknown Meteo Swiss icon %s", icon)
+        UNKNOWN_ICONS[icon] += 1
+    return condition
+
+
+def daily_forecast(data) -> list[Forecast]:
+    """Build the daily forecast of a forecast payload."""
+    return [
+        {
+            ATTR_FORECAST_TIME: forecast["dayDate"],
+            ATTR_FORECAST_NATIVE_TEMP_LOW: float(forecast["temperatureMin"]),
+            ATTR_FORECAST_NATIVE_TEMP: float(forecast["temperatureMax"]),
+            ATTR_FORECAST_NATIVE_PRECIPITATION: float(
+                forecast["precipitation"],
+            ),
+            ATTR_FORECAST_CONDITION: icon_condition(forecast["iconDay"]),
+        }
+        # Skip the first element - it's the forecast for the current day
+        for forecast in data["regionForecast"][1:]
+    ]
+
+
+def hourly_forecast(series: ForecastSeries, first: int) -> list[Forecast]:
+    """Build the hourly forecast from the given hour on."""
+    forecast = []
+    for time_ms, temp, precip, icon, bearing, wind in series.hours(first):
+        hour: Forecast = {
+            ATTR_FORECAST_TIME: dt_util.utc_from_timestamp(
+                time_ms / 1000
+            ).isoformat(),
+            ATTR_FORECAST_NATIVE_TEMP: temp,
+            ATTR_FORECAST_NATIVE_PRECIPITATION: precip,
+            ATTR_FORECAST_NATIVE_WIND_SPEED: wind,
+            ATTR_FORECAST_WIND_BEARING: bearing,
+        }
+        if icon != NO_ICON:
+            hour[ATTR_FORECAST_CONDITION] = icon_condition(icon)
+        forecast.append(hour)
+    return forecast
 
 
 async def async_setup_entry(
@@ -45,41 +116,106 @@ async def async_setup_entry(
 ):
     """Set up weather entity."""
     _LOGGER.debug("Starting async setup platform for weather")
-    c: MeteoSwissDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities([MeteoSwissWeather(entry.entry_id, c)], True)
+    d: MeteoSwissEntryData = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities(
+        [MeteoSwissWeather(entry.entry_id, d.forecast, d.real_time)],
+    )
 
 
 class MeteoSwissWeather(
-    CoordinatorEntity[MeteoSwissDataUpdateCoordinator],
+    CoordinatorEntity[MeteoSwissForecastCoordinator],
     WeatherEntity,
 ):
-    _attr_native_temperature_unit = TEMP_CELSIUS
-    _attr_native_pressure_unit = PRESSURE_HPA
-    _attr_native_wind_speed_unit = SPEED_KILOMETERS_PER_HOUR
+    _attr_native_temperature_unit = UnitOfTemperature.CELSIUS
+    _attr_native_pressure_unit = UnitOfPressure.HPA
+    _attr_native_wind_speed_unit = UnitOfSpeed.KILOMETERS_PER_HOUR
+    # The real-time sensors of the station already record the
+    # observations, and the fetch and observation times change with
+    # every update; only the condition is worth keeping.
+    _unrecorded_attributes = frozenset(
+        {
+            ATTR_FORECAST_FETCHED,
+            ATTR_OBSERVATION_TIME,
+            ATTR_WEATHER_HUMIDITY,
+            ATTR_WEATHER_PRESSURE,
+            ATTR_WEATHER_TEMPERATURE,
+            ATTR_WEATHER_WIND_BEARING,
+            ATTR_WEATHER_WIND_SPEED,
+        }
+    )
+    _attr_supported_features = (
+        WeatherEntityFeature.FORECAST_DAILY
+        | WeatherEntityFeature.FORECAST_HOURLY
+    )
 
     def __init__(
         self,
         integration_id: str,
-        coordinator: MeteoSwissDataUpdateCoordinator,
+        coordinator: MeteoSwissForecastCoordinator,
+        real_time: MeteoSwissRealTimeCoordinator | None,
     ):
         super().__init__(coordinator)
         self._attr_unique_id = "weather.%s" % integration_id
-        self._attr_station = coordinator.data[CONF_STATION]
-        self._attr_post_code = coordinator.data[CONF_POSTCODE]
-        self.__set_data(coordinator.data)
+        self._attr_station = coordinator.station
+        self._attr_post_code = coordinator.post_code
+        self._displayName = coordinator.forecast_name
+        self._real_time = real_time
+        self._condition: Observation | None = None
+        self._async_update_condition()
+        self._async_build_forecast()
 
-    def __set_data(self, data: dict[str, Any]):
-        self._displayName = data[CONF_FORECAST_NAME]
-        self._forecastData = data["forecast"]
-        self._condition = data["condition"]
+    async def async_added_to_hass(self) -> None:
+        """Also listen to the real-time coordinator, if any."""
+        await super().async_added_to_hass()
+        if self._real_time:
+            self.async_on_remove(
+                self._real_time.async_add_listener(
+                    self._handle_real_time_update,
+                )
+            )
+
+    @callback
+    def _async_build_forecast(self) -> None:
+        # Built once per forecast update; every state write and forecast
+        # subscriber is then served the same objects.
+        self._forecastData = self.coordinator.data
+        self._current_condition = icon_condition(
+            self._forecastData["currentWeather"]["icon"],
+        )
+        self._daily_forecast = daily_forecast(self._forecastData)
+        self._hourly_series: ForecastSeries | None = self._forecastData.get(
+            "graph"
+        )
+        self._hourly_forecast: tuple[int, list[Forecast]] | None = None
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle data update."""
-        data = self.coordinator.data
-        self.__set_data(data)
+        """Handle forecast update."""
+        self._async_build_forecast()
+        self.async_write_ha_state()
+        self.hass.async_create_background_task(
+            self.async_update_listeners(("daily", "hourly")),
+            name=f"{self.entity_id} forecast listeners",
+        )
+
+    @callback
+    def _async_update_condition(self) -> None:
+        if self._real_time and self._real_time.data_available:
+            self._condition = self._real_time.data
+        else:
+            self._condition = None
+
+    @callback
+    def _handle_real_time_update(self) -> None:
+        """Handle real-time update."""
+        self._async_update_condition()
         self.async_write_ha_state()
 
+    @property
+    def available(self) -> bool:
+        """Return whether the last good forecast is recent enough."""
+        return self.coordinator.data_available
+
     @property
     def name(self):
         return self._displayName
@@ -89,63 +225,32 @@ class MeteoSwissWeather(
         if not self._condition:
             # Real-time weather station provides no data.
             return
-        try:
-            return float(self._condition[0]["tre200s0"])
-        except Exception:
-            _LOGGER.exception("Error converting temp: %s", self._condition)
+        return self._condition.temperature
 
     @property
     def native_pressure(self):
         if not self._condition:
             # Real-time weather station provides no data.
             return
-        try:
-            return float(self._condition[0]["prestas0"])
-        except Exception:
-            _LOGGER.exception(
-                "Error converting pressure (qfe): %s",
-                self._condition,
-            )
+        return self._condition.pressure
 
     @property
     def pressure_qff(self):
         if not self._condition:
             # Real-time weather station provides no data.
             return
-        try:
-            return float(self.condition[0]["pp0qffs0"])
-        except Exception:
-            _LOGGER.exception(
-                "Error converting pressure (qff): %s",
-                self._condition,
-            )
+        return self._condition.pressure_qff
 
     @property
     def pressure_qnh(self):
         if not self._condition:
             # Real-time weather station provides no data.
             return
-        try:
-            return float(self.condition[0]["pp0qnhs0"])
-        except Exception:
-            _LOGGER.exception(
-                "Error converting pressure (qnh): %s",
-                self._condition,
-            )
+        return self._condition.pressure_qnh
 
     @property
     def state(self):
-        symbolId = self._forecastData["currentWeather"]["icon"]
-        cond = next(
-            (k for k, v in CONDITION_CLASSES.items() if int(symbolId) in v),
-            None,
-        )
-        _LOGGER.debug(
-            "Current symbol is %s condition is: %s",
-            symbolId,
-            cond,
-        )
-        return cond
+        return self._current_condition
 
     def msSymboldId(self):
         return self._forecastData["currentWeather"]["icon"]
@@ -155,26 +260,14 @@ class MeteoSwissWeather(
         if not self._condition:
             # Real-time weather station provides no data.
             return
-        try:
-            return float(self._condition[0]["ure200s0"])
-        except Exception:
-            _LOGGER.exception(
-                "Unable to convert humidity value: %s",
-                self._condition,
-            )
+        return self._condition.humidity
 
     @property
     def native_wind_speed(self):
         if not self._condition:
             # Real-time weather station provides no data.
             return
-        try:
-            return float(self._condition[0]["fu3010z0"])
-        except Exception:
-            _LOGGER.exception(
-                "Unable to convert windSpeed value: %s",
-                self._condition,
-            )
+        return self._condition.wind_speed
 
     @property
     def attribution(self):
@@ -193,41 +286,40 @@ class MeteoSwissWeather(
         if not self._condition:
             # Real-time weather station provides no data.
             return
-        try:
-            return self._condition[0]["dkl010z0"]
-        except Exception:
-            _LOGGER.exception(
-                "Unable to get wind_bearing from data: %s",
-                self._condition,
-            )
+        return self._condition.wind_direction
 
     @property
-    def forecast(self):
-        currentDate = datetime.datetime.now()
-        one_day = datetime.timedelta(days=1)
-        fcdata_out = []
-        # Skip the first element - it's the forecast for the current day
-        for forecast in self._forecastData["regionForecast"][1:]:
-            # calculating date of the forecast
-            currentDate = currentDate + one_day
-            data_out = {}
-            data_out[ATTR_FORECAST_TIME] = currentDate.strftime("%Y-%m-%d")
-            data_out[ATTR_FORECAST_NATIVE_TEMP_LOW] = float(
-                forecast["temperatureMin"],
-            )
-            data_out[ATTR_FORECAST_NATIVE_TEMP] = float(
-                forecast["temperatureMax"],
-            )
-            data_out[ATTR_FORECAST_NATIVE_PRECIPITATION] = float(
-                forecast["precipitation"],
-            )
-            data_out[ATTR_FORECAST_CONDITION] = next(
-                (
-                    k
-                    for k, v in CONDITION_CLASSES.items()
-                    if int(forecast["iconDay"]) in v
-                ),
-                None,
-            )
-            fcdata_out.append(data_out)
-        return fcdata_out
+    def extra_state_attributes(self):
+        """Return when the data shown was obtained."""
+        attributes = {
+            ATTR_FORECAST_FETCHED: self.coordinator.data_time,
+            ATTR_STALE: self.coordinator.stale,
+        }
+        if self._condition:
+            attributes[ATTR_OBSERVATION_TIME] = self._condition.time
+            if self._real_time.stale:
+                attributes[ATTR_STALE] = True
+        return attributes
+
+    @property
+    def forecast(self) -> list[Forecast]:
+        """Return the daily forecast built at the last update."""
+        return self._daily_forecast
+
+    async def async_forecast_daily(self) -> list[Forecast]:
+        """Return the daily forecast built at the last update."""
+        return self._daily_forecast
+
+    async def async_forecast_hourly(self) -> list[Forecast] | None:
+        """Return the hourly forecast from the current hour on.
+
+        Only the hours still to come are turned into forecast entries, at
+        most once per hour and forecast update.
+        """
+        series = self._hourly_series
+        if series is None:
+            return None
+        first = series.index(int(dt_util.utcnow().timestamp() * 1000))
+        if self._hourly_forecast is None or self._hourly_forecast[0] != first:
+            self._hourly_forecast = (first, hourly_forecast(series, first))
+        return self._hourly_forecast[1]